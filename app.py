@@ -1,9 +1,41 @@
 import streamlit as st
-import os
-import tempfile
-from bodyParser import process_document
+from conversionPool import start_default_pool
+from jobQueue import FAILED, JobQueue, QueueFull
+from pdfProfiles import PDF_PROFILES
+from preflight import HEAVY, PreflightRejected
+from resultCache import ResultCache
+from stagedPipeline import default_body_cache
 
 st.set_page_config(page_title="Document Processor", layout="centered")
+
+
+# One warm soffice pool per server process, shared by every session
+@st.cache_resource
+def get_conversion_pool():
+    return start_default_pool()
+
+
+# Formatted outputs keyed by content, so reruns and download clicks skip the pipeline
+@st.cache_resource
+def get_result_cache():
+    return ResultCache()
+
+
+# Formatted bodies without header/footer, so header-only edits just restamp the overlay
+@st.cache_resource
+def get_body_cache():
+    return default_body_cache()
+
+
+# Formatting runs on a bounded background queue shared by every session
+@st.cache_resource
+def get_job_queue():
+    return JobQueue(cache=get_result_cache(), body_cache=get_body_cache())
+
+
+get_conversion_pool()
+result_cache = get_result_cache()
+job_queue = get_job_queue()
 st.title("📄 Document Formatter & PDF Converter")
 
 # File Uploads
@@ -22,44 +54,97 @@ doi_url = st.text_input("DOI URL (optional)", value="https://doi.org/10.36713/ep
 footer_journal = st.text_input("Footer Journal Name", value="EPRA IJMR")
 
 journal_code = st.selectbox("Journal Code (for style settings)", ["IJMR", "EPRA", "Custom"], index=0)
+share_header_footer = st.checkbox("Share one header/footer across all sections", value=True)
+# "docx" and "lxml" write identical XML; "styles" (named paragraph styles) is opt-in
+STYLING_ENGINES = {
+    "docx": "direct formatting (python-docx)",
+    "lxml": "direct formatting, faster",
+    "styles": "named paragraph styles",
+}
+styling_engine = st.selectbox("Styling engine", list(STYLING_ENGINES), index=0,
+                              format_func=lambda name: f"{name} — {STYLING_ENGINES[name]}")
+downsample_images = st.checkbox("Downsample embedded images (lossy)", value=False)
+image_dpi = st.select_slider("Image resolution (DPI)", options=[96, 150, 220, 300], value=150, disabled=not downsample_images)
+pdf_profile = st.selectbox("PDF export profile", list(PDF_PROFILES), index=list(PDF_PROFILES).index("default"),
+                           format_func=lambda name: f"{name} — {PDF_PROFILES[name]['description']}")
 
 # --- Submit and Process ---
 if uploaded_docx and uploaded_logo:
-    with tempfile.TemporaryDirectory() as tmpdir:
-        input_path = os.path.join(tmpdir, "input.docx")
-        logo_path = os.path.join(tmpdir, "logo.png")
-        output_docx_path = os.path.join(tmpdir, "output.docx")
-
-        with open(input_path, "wb") as f:
-            f.write(uploaded_docx.read())
-
-        with open(logo_path, "wb") as f:
-            f.write(uploaded_logo.read())
-
-        with st.spinner("Processing document..."):
-            process_document(
-                input_doc=input_path,
-                logo_path=logo_path,
-                output_doc=output_docx_path,
-                journalCode=journal_code,
-                line1=line1,
-                line2=line2,
-                line3=line3,
-                start_page_number=start_page_number,
-                doi_url=doi_url,
-                footer_journal=footer_journal
-            )
-
-            output_pdf_path = output_docx_path.replace(".docx", ".pdf")
-
-        st.success("✅ Document processed successfully!")
-
-        with open(output_docx_path, "rb") as f:
-            st.download_button("📄 Download DOCX", f, file_name="formatted_output.docx")
-
-        if os.path.exists(output_pdf_path):
-            with open(output_pdf_path, "rb") as f:
-                st.download_button("📄 Download PDF", f, file_name="formatted_output.pdf")
+    docx_bytes = uploaded_docx.getvalue()
+    logo_bytes = uploaded_logo.getvalue()
+    params = {
+        "journalCode": journal_code,
+        "line1": line1,
+        "line2": line2,
+        "line3": line3,
+        "start_page_number": start_page_number,
+        "doi_url": doi_url,
+        "footer_journal": footer_journal,
+        "share_header_footer": share_header_footer,
+        "styling_engine": styling_engine,
+        "image_dpi": image_dpi if downsample_images else None,
+        "pdf_profile": pdf_profile,
+    }
+
+    try:
+        job = job_queue.submit(docx_bytes, logo_bytes, params)
+    except QueueFull:
+        load = job_queue.stats()
+        st.warning(f"⏳ The formatter is busy ({load['running']} running, {load['queued']} waiting). "
+                   "Please try again in a minute.")
+        st.stop()
+    except PreflightRejected as e:
+        st.error(f"✖ This document cannot be processed. {e}")
+        st.stop()
+
+    if job.lane == HEAVY and not job.done:
+        st.info(f"🐢 Large manuscript ({job.preflight['reason'].removeprefix('Heavy: ')}); "
+                "it runs in the slower lane for big documents.")
+
+    # Poll the background job; the session only waits, the work happens on the queue's workers
+    if not job.done:
+        status = st.empty()
+        bar = st.progress(0.0)
+        while not job.wait(timeout=0.3):
+            ahead = job_queue.position(job)
+            status.caption(f"Queued · {ahead} job(s) ahead" if ahead else f"Processing · {job.stage or 'starting'}")
+            bar.progress(job.progress)
+        status.empty()
+        bar.empty()
+
+    if job.status == FAILED:
+        st.error(f"✖ Processing failed: {job.error}")
+        st.stop()
+
+    st.success("✅ Document processed successfully!")
+    stats = result_cache.stats()
+    info = job.snapshot()
+    if job.cache_hit:
+        render = "Cached result"
+    elif job.stages and job.stages["body"] == "hit":
+        render = "Header/footer re-applied to cached body"
+    else:
+        render = "Fresh render"
+    st.caption(f"{render} · job {job.id[:8]} · "
+               f"waited {info['wait_seconds']:.1f}s, ran {info['run_seconds']:.1f}s · "
+               f"cache hits {stats['hits']} / misses {stats['misses']}")
+
+    # Keep the report of the render that produced this result; cache hits reuse it
+    reports = st.session_state.setdefault("run_reports", {})
+    if job.report:
+        reports[job.key] = job.report
+    report = reports.get(job.key)
+    if report:
+        with st.expander("⏱ Timing breakdown"):
+            st.table([{"stage": name, "ms": round(seconds * 1000, 1)} for name, seconds in report["stages"].items()])
+            st.json(report["counters"])
+
+    output_docx, output_pdf = job.docx, job.pdf
+    st.download_button("📄 Download DOCX", output_docx, file_name="formatted_output.docx")
+
+    if output_pdf:
+        st.download_button(f"📄 Download PDF ({len(output_pdf) / 1024:.0f} KB, {pdf_profile})", output_pdf,
+                           file_name="formatted_output.pdf")
 
 else:
     st.info("Please upload both a .docx file and a logo image.")
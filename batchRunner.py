@@ -0,0 +1,182 @@
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from bodyParser import format_document, convert_docx_to_pdf
+from instrumentation import RunRecorder, use_recorder
+from packageWriter import save_document
+from preflight import preflight
+
+
+# Keyword arguments of format_document that a manifest entry may set
+JOB_FIELDS = ("journalCode", "line1", "line2", "line3", "start_page_number", "doi_url", "footer_journal",
+              "share_header_footer", "styling_engine", "compact_xml", "image_dpi", "image_quality", "image_format")
+
+
+# -----------------------------------------------
+def load_manifest(manifest_path, output_dir=None):
+    """Read a JSON manifest: {"defaults": {...}, "jobs": [{...}, ...]} or a bare list of jobs."""
+    with open(manifest_path, encoding="utf-8") as f:
+        manifest = json.load(f)
+    if isinstance(manifest, list):
+        manifest = {"jobs": manifest}
+
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+    defaults = manifest.get("defaults", {})
+    output_dir = output_dir or defaults.get("output_dir") or os.path.join(base_dir, "generated")
+
+    jobs = []
+    outputs = {}
+    for i, entry in enumerate(manifest.get("jobs", [])):
+        job = dict(defaults)
+        job.update(entry)
+        job.setdefault("id", entry.get("id") or f"job-{i + 1}")
+        job["input"] = os.path.join(base_dir, job["input"])
+        job["logo"] = os.path.join(base_dir, job["logo"])
+        if job.get("output"):
+            job["output"] = os.path.join(base_dir, job["output"])
+        else:
+            stem = os.path.splitext(os.path.basename(job["input"]))[0]
+            job["output"] = os.path.join(output_dir, f"{stem}.docx")
+        # Two jobs writing one file would silently overwrite each other's DOCX and PDF
+        key = os.path.normcase(os.path.abspath(job["output"]))
+        if key in outputs:
+            raise ValueError(f"Jobs {outputs[key]!r} and {job['id']!r} both write {job['output']}; "
+                             "give one of them an explicit 'output'")
+        outputs[key] = job["id"]
+        jobs.append(job)
+    return jobs
+
+
+def run_job(job, scratch_root=None, convert_pdf=True):
+    """Format one manuscript in its own scratch directory; never raises, returns a result dict."""
+    result = {
+        "id": job.get("id"),
+        "input": job.get("input"),
+        "status": "ok",
+        "error": None,
+        "output_docx": None,
+        "output_pdf": None,
+        "lane": None,
+        "timings": {},
+        "counters": {},
+        "pid": os.getpid(),
+    }
+    started = time.perf_counter()
+    scratch = tempfile.mkdtemp(prefix="batch_", dir=scratch_root)
+    recorder = RunRecorder(name=str(result["id"]))
+    try:
+        kwargs = {k: job[k] for k in JOB_FIELDS if k in job}
+
+        with use_recorder(recorder) as rec:
+            check = preflight(job["input"])
+            result["lane"] = check["lane"]
+            if check["lane"] is None:
+                result["status"] = "rejected"
+                result["error"] = check["reason"]
+                return result
+
+            with rec.span("format"):
+                doc = format_document(job["input"], job["logo"], **kwargs)
+
+            stem = os.path.splitext(os.path.basename(job["output"]))[0]
+            scratch_docx = os.path.join(scratch, f"{stem}.docx")
+            with rec.span("save"):
+                save_document(doc, scratch_docx)
+            rec.count("output_bytes", os.path.getsize(scratch_docx))
+
+            os.makedirs(os.path.dirname(os.path.abspath(job["output"])), exist_ok=True)
+            pdf_path = None
+            if convert_pdf:
+                pdf_path = convert_docx_to_pdf(scratch_docx, scratch, profile_dir=os.path.join(scratch, "profile"),
+                                               pdf_profile=job.get("pdf_profile", "default"))
+
+        if convert_pdf:
+            if pdf_path and os.path.exists(pdf_path):
+                final_pdf = os.path.splitext(job["output"])[0] + ".pdf"
+                shutil.move(pdf_path, final_pdf)
+                result["output_pdf"] = final_pdf
+            else:
+                result["status"] = "pdf_failed"
+
+        shutil.move(scratch_docx, job["output"])
+        result["output_docx"] = job["output"]
+    except Exception as e:
+        result["status"] = "error"
+        result["error"] = f"{type(e).__name__}: {e}"
+        result["traceback"] = traceback.format_exc()
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+        result["timings"] = recorder.stage_totals()
+        result["timings"]["total"] = time.perf_counter() - started
+        result["counters"] = dict(recorder.counters)
+    return result
+
+
+def run_batch(jobs, workers=None, scratch_root=None, convert_pdf=True, on_result=None):
+    """Run every job on a process pool (one worker per core by default); results keep manifest order."""
+    workers = workers or os.cpu_count() or 1
+    started = time.perf_counter()
+    results = [None] * len(jobs)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(run_job, job, scratch_root, convert_pdf): i for i, job in enumerate(jobs)}
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:  # a worker process died (e.g. killed by the OOM killer)
+                result = {"id": jobs[i].get("id"), "input": jobs[i].get("input"), "status": "error",
+                          "error": f"{type(e).__name__}: {e}", "output_docx": None, "output_pdf": None, "timings": {}}
+            results[i] = result
+            if on_result:
+                on_result(result)
+
+    elapsed = time.perf_counter() - started
+    summary = {
+        "jobs": len(jobs),
+        "ok": sum(1 for r in results if r["status"] == "ok"),
+        "failed": sum(1 for r in results if r["status"] != "ok"),
+        "workers": workers,
+        "wall_seconds": elapsed,
+        "jobs_per_minute": len(jobs) / elapsed * 60 if elapsed else 0.0,
+    }
+    return {"summary": summary, "results": results}
+
+
+# ------------------- CLI -------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Format a batch of manuscripts from a JSON manifest.")
+    parser.add_argument("manifest", help="JSON manifest with 'defaults' and 'jobs'")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per core)")
+    parser.add_argument("--output-dir", default=None, help="directory for outputs without an explicit 'output'")
+    parser.add_argument("--scratch-dir", default=None, help="root for per-job scratch directories")
+    parser.add_argument("--no-pdf", action="store_true", help="skip PDF conversion")
+    parser.add_argument("--report", default=None, help="write the JSON result report here")
+    args = parser.parse_args(argv)
+
+    jobs = load_manifest(args.manifest, output_dir=args.output_dir)
+
+    def progress(result):
+        mark = "✔" if result["status"] == "ok" else "✖"
+        print(f"{mark} {result['id']}: {result['status']} in {result['timings'].get('total', 0):.2f}s")
+
+    report = run_batch(jobs, workers=args.workers, scratch_root=args.scratch_dir,
+                       convert_pdf=not args.no_pdf, on_result=progress)
+    summary = report["summary"]
+    print(f"✔ Batch finished: {summary['ok']}/{summary['jobs']} ok in {summary['wall_seconds']:.1f}s "
+          f"({summary['jobs_per_minute']:.1f} jobs/min on {summary['workers']} workers)")
+
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"✔ Report written to: {args.report}")
+    return 0 if summary["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
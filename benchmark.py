@@ -0,0 +1,191 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from instrumentation import RunRecorder
+from pdfProfiles import PDF_PROFILES
+from syntheticDocs import SIZE_MATRIX, make_logo, manuscript_bytes
+
+
+MATRICES = {
+    "quick": ["small", "medium"],
+    "full": list(SIZE_MATRIX),
+}
+
+# Spans recorded by bodyParser through instrumentation, in pipeline order
+STAGES = ("load", "normalize", "images", "header_footer", "styles", "title_block", "body_rebuild", "body_styling", "headings", "layout", "save", "pdf")
+
+
+def peak_rss_bytes(children=False):
+    # children=True: the largest terminated child process instead of this one
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF).ru_maxrss
+    return peak if platform.system() == "Darwin" else peak * 1024
+
+
+# -----------------------------------------------
+def run_case(case, input_path, logo_path, repeat=3, pdf=False, engine="docx", image_dpi=None, pdf_profile="default"):
+    """Runs in a fresh process so peak RSS belongs to this case's pipeline runs alone."""
+    from bodyParser import process_document
+
+    workdir = tempfile.mkdtemp(prefix="bench_")
+    try:
+        runs = []
+        for i in range(repeat):
+            recorder = RunRecorder(name=case)
+            output_path = os.path.join(workdir, f"{case}_out_{i}.docx")
+            started = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                process_document(input_path, logo_path, output_path,
+                                 line1="ISSN (Online): 0000-0000", line2="Benchmark Journal", line3="Volume:1 | Issue:1",
+                                 doi_url="https://doi.org/10.0000/bench", footer_journal="BENCH",
+                                 recorder=recorder, styling_engine=engine, convert_pdf=pdf, image_dpi=image_dpi,
+                                 pdf_profile=pdf_profile)
+            timings = recorder.stage_totals()
+            timings["total"] = time.perf_counter() - started
+            runs.append(timings)
+
+        stages = {}
+        for name in STAGES + ("total",):
+            values = [r[name] for r in runs if name in r]
+            if values:
+                stages[name] = {"median": statistics.median(values), "min": min(values)}
+        return {
+            "case": case,
+            "engine": engine,
+            "image_dpi": image_dpi,
+            "pdf_profile": pdf_profile if pdf else None,
+            "repeat": repeat,
+            "input_bytes": os.path.getsize(input_path),
+            "output_bytes": os.path.getsize(os.path.join(workdir, f"{case}_out_0.docx")),
+            "stages": stages,
+            "counters": dict(recorder.counters),
+            "peak_rss_bytes": peak_rss_bytes(),
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def run_matrix(cases, repeat=3, pdf=False, engine="docx", image_dpi=None, pdf_profiles=("default",)):
+    results = []
+    inputs_dir = tempfile.mkdtemp(prefix="bench_inputs_")
+    logo_path = os.path.join(inputs_dir, "logo.png")
+    with open(logo_path, "wb") as f:
+        f.write(make_logo())
+    try:
+        for case in cases:
+            # Generate in this process so the worker's peak RSS only covers the pipeline
+            input_path = os.path.join(inputs_dir, f"{case}.docx")
+            with open(input_path, "wb") as f:
+                f.write(manuscript_bytes(**SIZE_MATRIX[case]))
+            # One run per PDF profile so size and conversion time can be compared side by side
+            for pdf_profile in (pdf_profiles if pdf else ("default",)):
+                with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as executor:
+                    result = executor.submit(run_case, case, input_path, logo_path, repeat, pdf, engine, image_dpi,
+                                             pdf_profile).result()
+                result["spec"] = SIZE_MATRIX[case]
+                results.append(result)
+                _print_case(result)
+    finally:
+        shutil.rmtree(inputs_dir, ignore_errors=True)
+    return {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "results": results,
+    }
+
+
+def _print_case(result):
+    total = result["stages"]["total"]["median"]
+    rss = result["peak_rss_bytes"]
+    pdf = result["stages"].get("pdf")
+    pdf_bytes = result["counters"].get("pdf_bytes")
+    print(f"✔ {result['case']:12s} total {total * 1000:9.1f} ms"
+          + (f"  peak RSS {rss / 2**20:7.1f} MiB" if rss else "")
+          + (f"  pdf[{result['pdf_profile']}] {pdf['median'] * 1000:.0f} ms" if pdf else "")
+          + (f" {pdf_bytes / 1024:.0f} KB" if pdf and pdf_bytes else ""))
+
+
+# -----------------------------------------------
+def compare(current, baseline, threshold=0.15, min_delta=0.005):
+    """Flag stages whose median time (or peak RSS) grew by more than `threshold` over the baseline.
+
+    `min_delta` (seconds) ignores jitter on stages that only take a few milliseconds.
+    """
+    def case_key(r):
+        return r["case"], r.get("engine", "docx"), r.get("pdf_profile")
+
+    baseline_cases = {case_key(r): r for r in baseline["results"]}
+    regressions = []
+    for result in current["results"]:
+        base = baseline_cases.get(case_key(result))
+        if base is None:
+            continue
+        for stage, values in result["stages"].items():
+            if stage not in base["stages"]:
+                continue
+            now, before = values["median"], base["stages"][stage]["median"]
+            if now - before > min_delta and now > before * (1 + threshold):
+                regressions.append({"case": result["case"], "metric": stage, "baseline": before, "current": now,
+                                    "change": now / before - 1 if before else float("inf")})
+        now_rss, base_rss = result.get("peak_rss_bytes"), base.get("peak_rss_bytes")
+        if now_rss and base_rss and now_rss > base_rss * (1 + threshold):
+            regressions.append({"case": result["case"], "metric": "peak_rss_bytes", "baseline": base_rss,
+                                "current": now_rss, "change": now_rss / base_rss - 1})
+    return regressions
+
+
+# ------------------- CLI -------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time each process_document stage on synthetic manuscripts.")
+    parser.add_argument("--matrix", choices=sorted(MATRICES), default="quick")
+    parser.add_argument("--cases", nargs="*", help=f"explicit cases from: {', '.join(SIZE_MATRIX)}")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--engine", choices=["docx", "lxml", "styles"], default="docx", help="body styling engine")
+    parser.add_argument("--pdf", action="store_true", help="include soffice PDF conversion")
+    parser.add_argument("--pdf-profiles", nargs="+", choices=sorted(PDF_PROFILES), default=["default"],
+                        help="PDF export profiles to run with --pdf, one result per profile")
+    parser.add_argument("--image-dpi", type=int, default=None, help="enable image downsampling at this DPI")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--compare", metavar="BASELINE", help="baseline JSON to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.15, help="allowed relative slowdown (default 0.15)")
+    args = parser.parse_args(argv)
+
+    cases = args.cases or MATRICES[args.matrix]
+    report = run_matrix(cases, repeat=args.repeat, pdf=args.pdf, engine=args.engine, image_dpi=args.image_dpi,
+                        pdf_profiles=args.pdf_profiles)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"✔ Results written to: {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, threshold=args.threshold)
+        for r in regressions:
+            print(f"✖ {r['case']} {r['metric']}: {r['baseline']:.4g} -> {r['current']:.4g} (+{r['change'] * 100:.0f}%)")
+        if regressions:
+            return 1
+        print("✔ No regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
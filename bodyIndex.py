@@ -0,0 +1,101 @@
+from docx.oxml.ns import qn
+from docx.text.paragraph import Paragraph
+
+import instrumentation
+from paragraphClassifier import MARKERS, REGIONS, FeatureTable, classify_regions, journal_profile
+
+
+P_TAG = qn("w:p")
+TBL_TAG = qn("w:tbl")
+SECTPR_TAG = qn("w:sectPr")
+
+
+# -----------------------------------------------
+def is_heading_text(text):
+    return text.isupper() and len(text.split()) <= 6 and len(text) > 0
+
+
+# -----------------------------------------------
+class BodyEntry:
+    __slots__ = ("element", "kind", "paragraph", "text", "stripped", "upper",
+                 "word_count", "alignment", "has_runs", "heading", "region", "marker", "section_break")
+
+    def __init__(self, element, kind, parent):
+        self.element = element
+        self.kind = kind
+        self.paragraph = Paragraph(element, parent) if kind == "p" else None
+        self.region = "front"
+        self.marker = None
+        self.section_break = False
+        if self.paragraph is not None:
+            pPr = element.pPr
+            self.section_break = pPr is not None and pPr.sectPr is not None
+            self.alignment = self.paragraph.alignment
+            self.has_runs = bool(element.r_lst)
+            self._cache_text(self.paragraph.text)
+        else:
+            self.alignment = None
+            self.has_runs = False
+            self._cache_text("")
+
+    def _cache_text(self, text):
+        self.text = text
+        self.stripped = text.strip()
+        self.upper = self.stripped.upper()
+        self.word_count = len(self.stripped.split())
+        self.heading = is_heading_text(self.stripped)
+
+    def set_text(self, text):
+        # python-docx replaces the runs with a single run holding the text
+        self.paragraph.text = text
+        self.has_runs = True
+        self._cache_text(text)
+
+class BodyIndex:
+    """Annotated view of the body built in one pass; stages read text and flags from here.
+
+    `profile` holds the classification rules (see paragraphClassifier.journal_profile).
+    """
+
+    def __init__(self, doc, profile=None):
+        self.doc = doc
+        self.profile = profile or journal_profile()
+        self.entries = []
+        parent = doc._body
+        for el in doc.element.body.iterchildren():
+            if el.tag == P_TAG:
+                kind = "p"
+            elif el.tag == TBL_TAG:
+                kind = "tbl"
+            elif el.tag == SECTPR_TAG:
+                kind = "sectPr"
+            else:
+                kind = "other"
+            self.entries.append(BodyEntry(el, kind, parent))
+        instrumentation.count("paragraphs_scanned", sum(1 for e in self.entries if e.kind == "p"))
+        self.annotate_regions()
+
+    @property
+    def paragraphs(self):
+        return [e for e in self.entries if e.kind == "p"]
+
+    def add_entry(self, element, position=None):
+        entry = BodyEntry(element, "p" if element.tag == P_TAG else "tbl", self.doc._body)
+        if position is None:
+            self.entries.append(entry)
+        else:
+            self.entries.insert(position, entry)
+        return entry
+
+    def features(self, run_features=False):
+        return FeatureTable(self.paragraphs, run_features=run_features)
+
+    def annotate_regions(self):
+        # The abstract/references state machine of process_body_content_with_styles, classified
+        # in one batch: `region` is the state a paragraph is styled under, `marker` flags the switch lines.
+        paragraphs = self.paragraphs
+        heading, marker, region = classify_regions(self.features(), self.profile)
+        for entry, is_heading, m, r in zip(paragraphs, heading.tolist(), marker.tolist(), region.tolist()):
+            entry.heading = is_heading
+            entry.marker = MARKERS[m]
+            entry.region = REGIONS[r]
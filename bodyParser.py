@@ -1,125 +1,174 @@
 from docx import Document
 from docx.shared import Inches, Pt
 from docx.enum.text import WD_PARAGRAPH_ALIGNMENT
-from docx.enum.table import WD_TABLE_ALIGNMENT
 from docx.oxml import OxmlElement, parse_xml
 from docx.oxml.ns import qn
+import io
 import os
+import shutil
 import subprocess
+import logging
+import tempfile
+import time
+from pathlib import Path
 from docx.shared import Pt, RGBColor
-from copy import deepcopy
-from docx.text.paragraph import Paragraph
 from docx.table import Table
-
+from docx.document import Document as DocxDocument
+from conversionPool import get_default_pool, pdf_path_for
+from bodyIndex import BodyIndex, is_heading_text
+from paragraphClassifier import TAGS as HEADING_TAGS, classify_candidates, journal_profile, needs_run_features
+from headerTemplates import get_header_footer_template
+from fastStyler import LxmlStyler
+from documentStyles import StyleStyler, ensure_journal_styles, set_shading
+from imageOptimizer import optimize_images
+from xmlCompactor import compact_document
+from packageWriter import remember_source, save_document
+from tableWalker import fit_tables
+from pdfProfiles import cli_filter, filter_data, finish_pdf
+import instrumentation
+from instrumentation import use_recorder
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever a change alters the formatted output; result caches key on it
+PIPELINE_VERSION = "9"
 
 
 # -----------------------------------------------
-def convert_docx_to_pdf(input_path, output_dir=None):
+def convert_docx_to_pdf(input_path, output_dir=None, profile_dir=None, recorder=None, pdf_profile="default"):
+    # pdf_profile: a pdfProfiles.PDF_PROFILES name (web / print / archive / default)
+    if not output_dir:
+        output_dir = os.path.dirname(input_path)
+    options = filter_data(pdf_profile)
+    with use_recorder(recorder), instrumentation.span("pdf", profile=pdf_profile or "default") as span:
+        started = time.perf_counter()
+        # Use the warm soffice pool when one is running, one-shot soffice otherwise
+        pool = get_default_pool()
+        pdf_path = None
+        if pool is not None:
+            pool_started = time.perf_counter()
+            try:
+                pdf_path = pool.convert(input_path, output_dir, filter_data=options)
+                print(f"✔ PDF generated in: {output_dir}")
+                mode = "pool"
+            except Exception as e:
+                print("✖ Pooled PDF conversion failed, falling back to one-shot soffice:", e)
+            finally:
+                instrumentation.count("soffice_seconds", time.perf_counter() - pool_started)
+        if pdf_path is None:
+            pdf_path = convert_docx_to_pdf_oneshot(input_path, output_dir, profile_dir=profile_dir, pdf_profile=pdf_profile)
+            mode = "oneshot"
+        linearized = finish_pdf(pdf_path, pdf_profile)
+        _record_pdf(span, mode, pdf_path, pdf_profile, time.perf_counter() - started, linearized)
+        return pdf_path
+
+def _record_pdf(span, mode, pdf_path, pdf_profile="default", seconds=0.0, linearized=False):
+    if span is not None:
+        span["attrs"]["mode"] = mode
+        span["attrs"]["ok"] = bool(pdf_path)
+        span["attrs"]["linearized"] = linearized
+    if pdf_path and os.path.exists(pdf_path):
+        size = os.path.getsize(pdf_path)
+        instrumentation.count("pdf_bytes", size)
+        print(f"✔ PDF profile '{pdf_profile or 'default'}': {size / 1024:.0f} KB in {seconds:.2f}s")
+
+def convert_docx_to_pdf_oneshot(input_path, output_dir=None, profile_dir=None, pdf_profile="default"):
     if not output_dir:
         output_dir = os.path.dirname(input_path)
+    command = ["soffice", "--headless", "--convert-to", cli_filter(pdf_profile), "--outdir", output_dir, input_path]
+    if profile_dir:
+        # Concurrent soffice processes sharing a profile hand work to each other or fail on the lock
+        command.insert(1, "-env:UserInstallation=" + Path(profile_dir).resolve().as_uri())
+    started = time.perf_counter()
     try:
-        subprocess.run([
-            "soffice", "--headless", "--convert-to", "pdf", "--outdir", output_dir, input_path
-        ], check=True)
+        subprocess.run(command, check=True)
         print(f"✔ PDF generated in: {output_dir}")
+        return pdf_path_for(input_path, output_dir)
     except Exception as e:
         print("✖ PDF conversion failed:", e)
+        return None
+    finally:
+        instrumentation.count("soffice_seconds", time.perf_counter() - started)
+
+def convert_docx_bytes_to_pdf(docx_bytes, output_dir=None, recorder=None, pdf_profile="default", profile_dir=None):
+    # soffice only reads from disk, so the DOCX gets one private scratch file;
+    # profile_dir is handed to one-shot soffice when the pool is unavailable
+    workdir = tempfile.mkdtemp(prefix="docx2pdf_", dir=output_dir)
+    try:
+        input_path = os.path.join(workdir, "document.docx")
+        with open(input_path, "wb") as f:
+            f.write(docx_bytes)
+        pdf_path = convert_docx_to_pdf(input_path, workdir, profile_dir=profile_dir, recorder=recorder,
+                                       pdf_profile=pdf_profile)
+        if not pdf_path or not os.path.exists(pdf_path):
+            return None
+        with open(pdf_path, "rb") as f:
+            return f.read()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
 
 # -----------------------------------------------
-def set_double_bottom_border(cell):
-    tc = cell._tc
-    tcPr = tc.get_or_add_tcPr()
-    tcBorders = OxmlElement('w:tcBorders')
-    bottom = OxmlElement('w:bottom')
-    bottom.set(qn('w:val'), 'double')
-    bottom.set(qn('w:sz'), '6')
-    bottom.set(qn('w:space'), '0')
-    bottom.set(qn('w:color'), 'BFBFBF')
-    tcBorders.append(bottom)
-    tcPr.append(tcBorders)
+def load_document(source):
+    # Accepts a path, raw DOCX bytes, a file-like object or an already-open Document
+    if isinstance(source, DocxDocument):
+        return source
+    # The source is remembered so that save_document can copy unchanged media straight from it
+    if isinstance(source, (bytes, bytearray)):
+        return remember_source(Document(io.BytesIO(source)), source)
+    return remember_source(Document(source), source)
+
+def document_to_bytes(doc):
+    buffer = io.BytesIO()
+    save_document(doc, buffer)
+    data = buffer.getvalue()
+    instrumentation.count("output_bytes", len(data))
+    return data
 
+# -----------------------------------------------
 def add_header_footer_with_logo(doc_path, output_path, logo_path,
     line1, line2, line3, start_page_number=1, doi_url="", footer_journal="EPRA"):
 
-    doc = Document(doc_path)
-    for section in doc.sections:
-        header = section.header
-        header.is_linked_to_previous = False
-        for para in header.paragraphs:
-            header._element.remove(para._element)
-
-        table = header.add_table(rows=1, cols=2, width=Inches(8.0))
-        table.alignment = WD_TABLE_ALIGNMENT.CENTER
-        table.columns[0].width = Inches(0.6)
-        table.columns[1].width = Inches(7.4)
-        table.autofit = False
-
-        tbl = table._element
-        tbl_pr = tbl.xpath(".//w:tblPr")[0]
-        borders = OxmlElement('w:tblBorders')
-        for b in ('top', 'left', 'bottom', 'right', 'insideH', 'insideV'):
-            border = OxmlElement(f'w:{b}')
-            border.set(qn('w:val'), 'nil')
-            borders.append(border)
-        tbl_pr.append(borders)
-
-        cell_logo = table.cell(0, 0)
-        run = cell_logo.paragraphs[0].add_run()
-        run.add_picture(logo_path, width=Inches(0.4))
-        set_double_bottom_border(cell_logo)
-
-        cell_text = table.cell(0, 1)
-        para1 = cell_text.paragraphs[0]
-        para1.alignment = WD_PARAGRAPH_ALIGNMENT.RIGHT
-        run1 = para1.add_run(line1)
-        run1.bold = True
-        run1.font.size = Pt(9)
-
-        para2 = cell_text.add_paragraph()
-        para2.alignment = WD_PARAGRAPH_ALIGNMENT.CENTER
-        run2 = para2.add_run(line2)
-        run2.bold = True
-        run2.font.size = Pt(11)
-
-        para3 = cell_text.add_paragraph()
-        para3.alignment = WD_PARAGRAPH_ALIGNMENT.CENTER
-        run3 = para3.add_run(line3)
-        run3.bold = True
-        run3.font.size = Pt(8)
-        set_double_bottom_border(cell_text)
-
-        footer = section.footer
-        footer.is_linked_to_previous = False
-        for para in footer.paragraphs:
-            footer._element.remove(para._element)
-
-        p = footer.add_paragraph()
-        p.alignment = WD_PARAGRAPH_ALIGNMENT.CENTER
-        footer_text = f"© 2025 {footer_journal} | http://eprajournals.com/"
-        if doi_url:
-            footer_text += f" | Journal DOI URL: {doi_url}"
-        footer_text += " | Page "
-
-        run = p.add_run(footer_text)
-        run.font.size = Pt(8)
-
-        fldChar1 = OxmlElement("w:fldChar")
-        fldChar1.set(qn("w:fldCharType"), "begin")
-        instrText = OxmlElement("w:instrText")
-        instrText.text = "PAGE"
-        fldChar2 = OxmlElement("w:fldChar")
-        fldChar2.set(qn("w:fldCharType"), "end")
-        run._r.append(fldChar1)
-        run._r.append(instrText)
-        run._r.append(fldChar2)
-
+    doc = load_document(doc_path)
+    apply_header_footer(doc, logo_path, line1, line2, line3,
+                        start_page_number=start_page_number, doi_url=doi_url, footer_journal=footer_journal)
     doc.save(output_path)
     print(f"✔ DOCX saved with header/footer at: {output_path}")
 
+# w:sectPr children that come after w:pgNumType in the schema sequence
+_PGNUMTYPE_SUCCESSORS = ("w:cols", "w:formProt", "w:vAlign", "w:noEndnote", "w:titlePg", "w:textDirection",
+                         "w:bidi", "w:rtlGutter", "w:docGrid", "w:printerSettings", "w:sectPrChange")
+
+def set_page_numbering(doc, start_page_number=1):
+    """Number pages continuously from start_page_number: the first section restarts there, later ones carry on."""
+    start = int(start_page_number or 1)
+    for i, section in enumerate(doc.sections):
+        sectPr = section._sectPr
+        pgNumType = sectPr.find(qn("w:pgNumType"))
+        if i == 0 and (start != 1 or (pgNumType is not None and pgNumType.get(qn("w:start")) is not None)):
+            if pgNumType is None:
+                pgNumType = OxmlElement("w:pgNumType")
+                sectPr.insert_element_before(pgNumType, *_PGNUMTYPE_SUCCESSORS)
+            pgNumType.set(qn("w:start"), str(start))
+        elif pgNumType is not None:
+            # A restart in a later section would break the issue's running page numbers
+            pgNumType.attrib.pop(qn("w:start"), None)
+            if not len(pgNumType.attrib):
+                sectPr.remove(pgNumType)
+
+def apply_header_footer(doc, logo, line1, line2, line3, start_page_number=1, doi_url="", footer_journal="EPRA",
+                        share_parts=False):
+    # Built once per logo/text combination and cloned into each section
+    template = get_header_footer_template(logo, line1, line2, line3, doi_url=doi_url, footer_journal=footer_journal)
+    report = template.apply(doc, share_parts=share_parts)
+    set_page_numbering(doc, start_page_number)
+    if share_parts:
+        print(f"✔ Header/footer shared across {report['sections']} sections "
+              f"({report['header_parts']} header / {report['footer_parts']} footer parts, {report['deduplicated']} deduplicated)")
+    return report
+
 # -----------------------------------------------
 def is_heading(paragraph):
-    text = paragraph.text.strip()
-    return text.isupper() and len(text.split()) <= 6 and len(text) > 0
+    return is_heading_text(paragraph.text.strip())
 
 def apply_heading_style(paragraph, style_options, background_color=False):
     run = paragraph.runs[0] if paragraph.runs else paragraph.add_run()
@@ -128,47 +177,24 @@ def apply_heading_style(paragraph, style_options, background_color=False):
     run.font.name = style_options.get("font_name", "Times New Roman")
     paragraph.alignment = WD_PARAGRAPH_ALIGNMENT.CENTER
 
+    # Replaced rather than appended, so restyling a paragraph never stacks w:shd / w:color
     p = paragraph._element
-    pPr = p.get_or_add_pPr()
-    shd = OxmlElement('w:shd')
-    shd.set(qn('w:val'), 'clear')
-    shd.set(qn('w:color'), 'auto')
-    if background_color:
-        shd.set(qn('w:fill'), style_options.get("heading_bg_color", "E6E6E6"))
-    pPr.append(shd)
+    set_shading(p.get_or_add_pPr(), style_options.get("heading_bg_color", "E6E6E6") if background_color else None)
 
     rPr = run._element.get_or_add_rPr()
-    color = OxmlElement('w:color')
-    color.set(qn('w:val'), style_options.get("heading_color", "000000"))
-    rPr.append(color)
+    rPr._remove_color()
+    rPr.get_or_add_color().set(qn('w:val'), style_options.get("heading_color", "000000"))
 
 def apply_font_style(paragraph, style_options):
     paragraph.alignment = WD_PARAGRAPH_ALIGNMENT.JUSTIFY
-    for run in paragraph.runs:
+    runs = paragraph.runs
+    for run in runs:
         run.font.name = style_options.get("font_name", "Times New Roman")
         run.font.size = Pt(style_options.get("font_size", 10))
+    return len(runs)
 
 
 
-def is_possible_heading(paragraph):
-    text = paragraph.text.strip()
-    if not text or not paragraph.runs:
-        return None
-
-    is_bold = any(run.bold for run in paragraph.runs) or True
-    alignment = paragraph.alignment
-
-    word_count = len(text.split())
-    if 1 <= word_count <= 10 and is_bold:
-        print(f"Possible heading found: '{text}' with alignment {alignment}")
-        if alignment == WD_PARAGRAPH_ALIGNMENT.CENTER:
-            return "heading"
-        # elif alignment == WD_PARAGRAPH_ALIGNMENT.LEFT or alignment == None:
-        else:
-            return "subheading"
-    return None
-
-
 # def process_title_author_section(paragraphs):
 #     output = []
 #     before_abstract = True
@@ -202,9 +228,6 @@ def is_possible_heading(paragraph):
 #         }
 
 
-def clone_element(el):
-    return deepcopy(el)
-
 def is_block_to_remove(text, block):
     return (
         text == block['title']
@@ -247,6 +270,49 @@ def process_title_author_section(paragraphs):
 
     return block
 
+def replace_title_block(doc, index, block, engine="docx"):
+    # Detach only the matching paragraphs; tables, drawings and every sectPr stay in place
+    body = doc.element.body
+    kept_entries = []
+    for entry in index.entries:
+        if entry.kind == "p" and not entry.section_break and is_block_to_remove(entry.stripped, block):
+            body.remove(entry.element)
+        else:
+            kept_entries.append(entry)
+
+    # Insert styled title, authors, affiliations at the head of the body
+    anchor = body[0] if len(body) else None
+    if engine == "styles":
+        styler = StyleStyler(doc)
+        title_paragraphs = [
+            styler.add_paragraph(doc, block['title'], "title", before=anchor),
+            styler.add_paragraph(doc, block['authors'], "authors", before=anchor),
+            styler.add_paragraph(doc, ' '.join(block['affiliations']), "affiliation", before=anchor),
+        ]
+        if block['corresponding']:
+            title_paragraphs.append(styler.add_paragraph(doc, block['corresponding'], "corresponding", before=anchor))
+    else:
+        title_paragraphs = _direct_title_paragraphs(doc, block, anchor)
+
+    index.entries = kept_entries
+    for position, para in enumerate(title_paragraphs):
+        entry = index.add_entry(para._element, position)
+        # The title-block styles centre these without a direct w:jc; heading detection reads the alignment
+        entry.alignment = WD_PARAGRAPH_ALIGNMENT.CENTER
+    index.annotate_regions()
+
+def _direct_title_paragraphs(doc, block, anchor):
+    title_paragraphs = [
+        style_paragraph1(doc, block['title'], font_name="Georgia", size=16, bold=True, before=anchor),
+        style_paragraph1(doc, block['authors'], font_name="Times New Roman", size=14, before=anchor),
+        style_paragraph1(doc, ' '.join(block['affiliations']), font_name="Antiqua", size=11, before=anchor),
+    ]
+    # for aff in block['affiliations']:
+    #     style_paragraph1(doc, aff, font_name="Calibri", size=11)
+    if block['corresponding']:
+        title_paragraphs.append(style_paragraph1(doc, block['corresponding'], font_name="Times New Roman", size=10, bold=True, before=anchor))
+    return title_paragraphs
+
 def style_paragraph(para, font_name, size, bold=False, color=None, align_center=True):
     para.alignment = WD_PARAGRAPH_ALIGNMENT.CENTER if align_center else WD_PARAGRAPH_ALIGNMENT.LEFT
     run = para.runs[0] if para.runs else para.add_run()
@@ -256,8 +322,10 @@ def style_paragraph(para, font_name, size, bold=False, color=None, align_center=
     if color:
         run.font.color.rgb = RGBColor.from_string(color)
 
-def style_paragraph1(doc, text, font_name, size, bold=False, color=None, align_center=True):
+def style_paragraph1(doc, text, font_name, size, bold=False, color=None, align_center=True, before=None):
     para = doc.add_paragraph()
+    if before is not None:
+        before.addprevious(para._element)
     para.alignment = WD_PARAGRAPH_ALIGNMENT.CENTER if align_center else WD_PARAGRAPH_ALIGNMENT.LEFT
     run = para.add_run(text)
     run.font.name = font_name
@@ -267,25 +335,94 @@ def style_paragraph1(doc, text, font_name, size, bold=False, color=None, align_c
         run.font.color.rgb = RGBColor.from_string(color)
     return para
 
-def process_headings(document, heading_font="Times New Roman", heading_size=11, heading_color="000000", subheading_size=10):
-    for para in document.paragraphs:
-        if "corresponding author" in para.text.lower():
+def body_stylers(engine, style_options, doc=None):
+    # "docx" goes through python-docx Paragraph/Run setters, "lxml" edits the w:p elements directly;
+    # both produce the same XML. "styles" assigns the journal paragraph styles instead of run formatting.
+    # Returns (font_style, heading_style, paragraph_style) taking index entries.
+    if engine == "styles":
+        styler = StyleStyler(doc)
+        # Paragraphs in the author's own styles (Heading 2, List Bullet, Quote, ...) keep them and are
+        # formatted directly, exactly as the docx engine would
+        direct = LxmlStyler(style_options)
+
+        def font_style(entry):
+            if not styler.owns(entry.element):
+                return direct.font_style(entry.element)
+            return styler.font_style(entry.element, reference=entry.region == "references")
+
+        def heading_style(entry, background_color=False):
+            if not styler.owns(entry.element):
+                direct.heading_style(entry.element, background_color)
+            else:
+                styler.heading_style(entry.element, background_color)
+
+        def paragraph_style(entry, font_name, size, bold=False, color=None, align_center=True):
+            if not styler.owns(entry.element):
+                direct.style_paragraph(entry.element, font_name, size, bold=bold, color=color, align_center=align_center)
+            else:
+                styler.style_paragraph(entry.element, align_center=align_center)
+    elif engine == "lxml":
+        styler = LxmlStyler(style_options)
+
+        def font_style(entry):
+            return styler.font_style(entry.element)
+
+        def heading_style(entry, background_color=False):
+            styler.heading_style(entry.element, background_color)
+
+        def paragraph_style(entry, *args, **kwargs):
+            styler.style_paragraph(entry.element, *args, **kwargs)
+    elif engine == "docx":
+        def font_style(entry):
+            return apply_font_style(entry.paragraph, style_options)
+
+        def heading_style(entry, background_color=False):
+            apply_heading_style(entry.paragraph, style_options, background_color=background_color)
+
+        def paragraph_style(entry, *args, **kwargs):
+            style_paragraph(entry.paragraph, *args, **kwargs)
+    else:
+        raise ValueError(f"Unknown styling engine: {engine!r}")
+    return font_style, heading_style, paragraph_style
+
+def process_headings(document, heading_font="Times New Roman", heading_size=11, heading_color="000000", subheading_size=10, index=None, engine="docx"):
+    if index is None:
+        index = BodyIndex(document)
+    _, _, paragraph_style = body_stylers(engine, {}, document)
+    candidates = 0
+    # Candidate tags for every paragraph in one batch, from the alignment left by body styling
+    paragraphs = index.paragraphs
+    tags = classify_candidates(index.features(run_features=needs_run_features(index.profile)), index.profile)
+    for entry, code in zip(paragraphs, tags.tolist()):
+        if "corresponding author" in entry.text.lower():
             continue
-        tag = is_possible_heading(para)
+        tag = HEADING_TAGS[code]
+        if tag:
+            candidates += 1
+            logger.debug("Possible heading found: %r with alignment %s", entry.stripped, entry.alignment)
         # if(tag):``
             # print(f"Processing paragraph:tag = {tag}, text = {para.text.strip()}")
         if tag == "heading":
             # color = "0000FF" if para.text.strip().lower() == "abstract" else None
-            style_paragraph(para, heading_font, size = 11, bold=True, color=heading_color, align_center=True)
+            paragraph_style(entry, heading_font, size = 11, bold=True, color=heading_color, align_center=True)
+            entry.alignment = WD_PARAGRAPH_ALIGNMENT.CENTER
+            entry.has_runs = True
         elif tag == "subheading":
-            style_paragraph(para, heading_font, size = 10, bold=True, color=heading_color, align_center=False)
+            paragraph_style(entry, heading_font, size = 10, bold=True, color=heading_color, align_center=False)
+            entry.alignment = WD_PARAGRAPH_ALIGNMENT.LEFT
+            entry.has_runs = True
+    instrumentation.count("headings_found", candidates)
+    instrumentation.count("runs_styled", candidates)
 
 # ---------- LAYOUTS ----------
-def apply_two_column_layout_after_abstract(doc):
+def apply_two_column_layout_after_abstract(doc, index=None):
     print("Applying two-column layout after ABSTRACT section...")
+    if index is None:
+        index = BodyIndex(doc)
+    paragraphs = index.paragraphs
     abstract_index = -1
-    for i, para in enumerate(doc.paragraphs):
-        if para.text.strip().upper() == "ABSTRACT":
+    for i, entry in enumerate(paragraphs):
+        if entry.upper == "ABSTRACT":
             abstract_index = i
             break
 
@@ -294,11 +431,10 @@ def apply_two_column_layout_after_abstract(doc):
         return
 
     insert_index = abstract_index + 2
-    if insert_index >= len(doc.paragraphs):
-        insert_index = len(doc.paragraphs) - 1
+    if insert_index >= len(paragraphs):
+        insert_index = len(paragraphs) - 1
 
-    para = doc.paragraphs[insert_index]
-    p = para._element
+    p = paragraphs[insert_index].element
     sectPr = OxmlElement('w:sectPr')
     cols = OxmlElement('w:cols')
     cols.set(qn('w:num'), '2')
@@ -306,48 +442,62 @@ def apply_two_column_layout_after_abstract(doc):
     p.append(sectPr)
 
 # ---------- MAIN BODY FORMATTING ----------
-def process_body_content_with_styles(doc, layout_mode="two_column", style_options={ "font_name": "Times New Roman", "font_size": 10,}):
-    found_abstract = False
-    found_references = False
+def process_body_content_with_styles(doc, layout_mode="two_column", style_options={ "font_name": "Times New Roman", "font_size": 10,}, index=None, engine="docx"):
+    if index is None:
+        index = BodyIndex(doc)
+    font_style, heading_style, _ = body_stylers(engine, style_options, doc)
     reference_index = 1
-
-    for para in doc.paragraphs:
-        text = para.text.strip()
-
-        if text.upper() == "ABSTRACT":
-            para.text = "ABSTRACT"
-            apply_heading_style(para, style_options, background_color = True)
-            found_abstract = True
+    runs_styled = 0
+
+    # Regions and markers come from BodyIndex.annotate_regions, computed on the unstyled text
+    for entry in index.paragraphs:
+        text = entry.stripped
+        in_abstract = entry.region == "abstract"
+
+        if entry.marker == "abstract":
+            entry.set_text("ABSTRACT")
+            heading_style(entry, background_color = True)
+            runs_styled += 1
+            entry.alignment = WD_PARAGRAPH_ALIGNMENT.CENTER
             continue
 
-        if found_abstract and text != "" and not is_heading(para):
-            apply_font_style(para, style_options)
+        if in_abstract and text != "" and not entry.heading:
+            runs_styled += font_style(entry)
+            entry.alignment = WD_PARAGRAPH_ALIGNMENT.JUSTIFY
             # found_abstract = False
 
-        elif is_heading(para):
-            apply_heading_style(para, style_options, background_color = False)
-
-        elif text.upper() == "REFERENCES":
-            para.text = "REFERENCES"
-            apply_heading_style(para, style_options, background_color = False)
-            found_references = True
+        elif entry.heading:
+            heading_style(entry, background_color = False)
+            runs_styled += 1
+            entry.alignment = WD_PARAGRAPH_ALIGNMENT.CENTER
+            entry.has_runs = True
+
+        elif entry.marker == "references":
+            # Journal profiles may add other headings (BIBLIOGRAPHY, WORKS CITED); their wording is kept
+            if text.upper() == "REFERENCES":
+                entry.set_text("REFERENCES")
+            heading_style(entry, background_color = False)
+            runs_styled += 1
+            entry.alignment = WD_PARAGRAPH_ALIGNMENT.CENTER
             reference_index = 1
 
-        elif found_references and text != "":
-            para.text = f"[{reference_index}] {text}"
+        elif entry.region == "references" and text != "":
+            entry.set_text(f"[{reference_index}] {text}")
             reference_index += 1
-            apply_font_style(para, style_options)
+            runs_styled += font_style(entry)
+            entry.alignment = WD_PARAGRAPH_ALIGNMENT.JUSTIFY
 
         else:
             # print(f"Processing paragraph: {text}")
-            if found_abstract and not is_heading(para):
-                apply_font_style(para, style_options)
+            if in_abstract and not entry.heading:
+                runs_styled += font_style(entry)
+                entry.alignment = WD_PARAGRAPH_ALIGNMENT.JUSTIFY
             # run.font.size = Pt(10)
             # run.font.name = "Times New Roman"
-
+    instrumentation.count("runs_styled", runs_styled)
 
     if layout_mode == "two_column":
-        apply_two_column_layout_after_abstract(doc)
+        apply_two_column_layout_after_abstract(doc, index=index)
 # Apply Two column layout from 1
 def apply_two_column_layout(section):
     sectPr = section._sectPr
@@ -363,17 +513,8 @@ def center_tables_and_images(doc):
     section = doc.sections[0]
     usable_width = section.page_width - section.left_margin - section.right_margin
 
-    for table in doc.tables:
-        table.alignment = WD_TABLE_ALIGNMENT.CENTER
-        # Auto-resize columns proportionally if table is too wide
-        total_col_width = sum(cell.width or 0 for cell in table.rows[0].cells)
-        if total_col_width and total_col_width > usable_width:
-            scale = usable_width / total_col_width
-            for row in table.rows:
-                for cell in row.cells:
-                    for paragraph in cell.paragraphs:
-                        for run in paragraph.runs:
-                            run.font.size = None  # remove fixed size
+    # Center every table and shrink over-wide ones to the text width, one XML walk per table
+    fit_tables(doc, usable_width)
     # for para in doc.paragraphs:
     #     for run in para.runs:
     #         if 'graphic' in run._element.xml:
@@ -397,112 +538,130 @@ def process_document(input_doc, logo_path, output_doc,
                      journalCode="IJMR",
                      line1="", line2="", line3="",
                      start_page_number=1,
-                     doi_url="", footer_journal=""):
-    temp_doc = "generated/temp_with_header_7.docx"
-
-    # add_header_footer_with_logo(
-    #     doc_path=input_doc,
-    #     output_path=temp_doc,
-    #     logo_path=logo_path,
-    #     line1="ISSN (Online): 2455-3662",
-    #     line2="EPRA International Journal of Multidisciplinary Research (IJMR) - Peer Reviewed Journal",
-    #     line3="Volume:11 | Issue:6 | June 2025 || Journal DOI: 10.36713/epra2013 || SJIF Impact Factor 2025: 8.691 || ISI Value: 1.188",
-    #     start_page_number=3,
-    #     doi_url="https://doi.org/10.36713/epra2013",
-    #     footer_journal="EPRA IJMR"
-    # )
-    add_header_footer_with_logo(
-        doc_path=input_doc,
-        output_path=temp_doc,
-        logo_path=logo_path,
-        line1=line1,
-        line2=line2,
-        line3=line3,
-        start_page_number=start_page_number,
-        doi_url=doi_url,
-        footer_journal=footer_journal
-    )
-
-    doc = Document(temp_doc)
-      # First page title-author block
-    # First page title-author block
-    block = process_title_author_section(doc.paragraphs)
-    print(f"Title: '{block['title']}', Authors: '{block['authors']}', Affiliations: '{block['affiliations']}', Corresponding: '{block['corresponding']}'")
-    # Remove old paragraphs matching title/authors/affiliations/corresponding
-    new_body = []
-    elements_to_keep = []
-
-    for el in doc.element.body:
-        # Wrap the XML element as a paragraph or table
-        if el.tag.endswith('p'):
-            para = Paragraph(el, doc)
-            text = para.text.strip()
-            if not is_block_to_remove(text, block):
-                elements_to_keep.append(clone_element(el))
-        elif el.tag.endswith('tbl'):
-            elements_to_keep.append(clone_element(el))
-
-    # print("doc.paragraphs:", len(doc.paragraphs))
-    seen = set()
-    for para in doc.paragraphs:
-        text = para.text.strip()
-        # if not text:
-        #     continue
-        # if text in [block['title'], block['authors'], *block['affiliations'], block['corresponding']]:
-        #     doc._element.body.remove(para._element)
-        if text in [block['title'], block['authors'], block['corresponding']] or text in block['affiliations']:
-            continue
-        new_body.append(para.text)
-
-    # Clear all paragraphs and rebuild
-    doc._body.clear_content()
+                     doi_url="", footer_journal="", recorder=None, convert_pdf=True, pdf_profile="default", **options):
+    # recorder: an instrumentation.RunRecorder collecting stage spans, counters and (optionally) a cProfile
+    with use_recorder(recorder), instrumentation.span("process_document"):
+        doc = format_document(input_doc, logo_path,
+                              journalCode=journalCode,
+                              line1=line1, line2=line2, line3=line3,
+                              start_page_number=start_page_number,
+                              doi_url=doi_url, footer_journal=footer_journal, **options)
+        with instrumentation.span("save"):
+            save_document(doc, output_doc)
+            instrumentation.count("output_bytes", os.path.getsize(output_doc))
+        print(f"✔ Final document saved at: {output_doc}")
+        if convert_pdf:
+            convert_docx_to_pdf(output_doc, pdf_profile=pdf_profile)
+
+def process_document_bytes(input_doc, logo,
+                           journalCode="IJMR",
+                           line1="", line2="", line3="",
+                           start_page_number=1,
+                           doi_url="", footer_journal="", recorder=None, **options):
+    # Bytes in, bytes out: the document is parsed once and serialized once
+    with use_recorder(recorder), instrumentation.span("process_document"):
+        doc = format_document(input_doc, logo,
+                              journalCode=journalCode,
+                              line1=line1, line2=line2, line3=line3,
+                              start_page_number=start_page_number,
+                              doi_url=doi_url, footer_journal=footer_journal, **options)
+        with instrumentation.span("save"):
+            return document_to_bytes(doc)
+
+def format_document(input_doc, logo,
+                    journalCode="IJMR",
+                    line1="", line2="", line3="",
+                    start_page_number=1,
+                    doi_url="", footer_journal="",
+                    share_header_footer=False,
+                    styling_engine="docx",
+                    compact_xml=True,
+                    image_dpi=None, image_quality=80, image_format="auto",
+                    recorder=None):
+    # image_dpi: resample embedded pictures to this resolution at their display size (None leaves them as-is)
+    with use_recorder(recorder):
+        doc = format_body(input_doc, journalCode=journalCode, styling_engine=styling_engine, compact_xml=compact_xml,
+                          image_dpi=image_dpi, image_quality=image_quality, image_format=image_format)
+        apply_overlay(doc, logo, line1=line1, line2=line2, line3=line3, start_page_number=start_page_number,
+                      doi_url=doi_url, footer_journal=footer_journal, share_header_footer=share_header_footer)
+    return doc
+
+# Parameters that only reach the header/footer overlay; editing them never requires restyling the body
+OVERLAY_FIELDS = ("line1", "line2", "line3", "start_page_number", "doi_url", "footer_journal", "share_header_footer")
+
+def format_body(input_doc, journalCode="IJMR", styling_engine="docx", compact_xml=True,
+                image_dpi=None, image_quality=80, image_format="auto", recorder=None):
+    """Body stage: everything in document.xml except the header/footer overlay."""
+    span = instrumentation.span
+    with use_recorder(recorder):
+        with span("load"):
+            doc = load_document(input_doc)
+        if compact_xml:
+            # Merge fragmented runs and drop rsid/proofing noise so every later loop sees less XML
+            with span("normalize"):
+                report = compact_document(doc)
+            print(f"✔ XML compacted: {report['elements_before']} → {report['elements_after']} elements, "
+                  f"{report['runs_before']} → {report['runs_after']} runs")
+        if image_dpi:
+            with span("images", dpi=image_dpi):
+                report = optimize_images(doc, dpi=image_dpi, quality=image_quality, image_format=image_format)
+            print(f"✔ Images: {report['optimized']}/{report['images']} recompressed, "
+                  f"{report['bytes_saved'] / 1024:.0f} KB saved")
+
+        layout_mode = "full_page"  # or "full_page", "two_column"
+        style_options = {
+            "font_name": "Times New Roman",
+            "font_size": 10,
+            "heading_font_size": 11,
+            "heading_color": "000000",
+            "heading_bg_color": "D9D9D9"
+        }
+        if styling_engine == "styles":
+            with span("styles"):
+                ensure_journal_styles(doc, style_options)
+
+        with span("title_block"):
+            # One annotated pass over the body; every stage below reads from it
+            index = BodyIndex(doc, profile=journal_profile(journalCode))
+
+            # First page title-author block
+            block = process_title_author_section(index.paragraphs)
+        print(f"Title: '{block['title']}', Authors: '{block['authors']}', Affiliations: '{block['affiliations']}', Corresponding: '{block['corresponding']}'")
+
+        with span("body_rebuild"):
+            replace_title_block(doc, index, block, engine=styling_engine)
+
+        # process_body_content_with_styles(doc, journalCode=journalCode, )
+        with span("body_styling", engine=styling_engine):
+            process_body_content_with_styles(doc, layout_mode=layout_mode, style_options=style_options, index=index, engine=styling_engine)
+        with span("headings"):
+            process_headings(doc, index=index, engine=styling_engine)
+
+        # apply_two_column_layout_after_abstract(doc)
+        if layout_mode == "two_column":
+            with span("layout"):
+                for section in doc.sections:
+                    apply_two_column_layout(section)
+                center_tables_and_images(doc)
+    return doc
+
+def apply_overlay(doc, logo, line1="", line2="", line3="", start_page_number=1, doi_url="", footer_journal="",
+                  share_header_footer=False, recorder=None):
+    """Overlay stage: journal header/footer stamped onto an already formatted body."""
+    with use_recorder(recorder), instrumentation.span("header_footer"):
+        apply_header_footer(
+            doc,
+            logo,
+            line1=line1,
+            line2=line2,
+            line3=line3,
+            start_page_number=start_page_number,
+            doi_url=doi_url,
+            footer_journal=footer_journal,
+            share_parts=share_header_footer
+        )
+    return doc
 
-    # Add styled title, authors, affiliations
-    style_paragraph1(doc, block['title'], font_name="Georgia", size=16, bold=True)
-    style_paragraph1(doc, block['authors'], font_name="Times New Roman", size=14)
-    style_paragraph1(doc, ' '.join(block['affiliations']), font_name="Antiqua", size=11)
-    # for aff in block['affiliations']:
-    #     style_paragraph1(doc, aff, font_name="Calibri", size=11)
-    if block['corresponding']:
-        style_paragraph1(doc, block['corresponding'], font_name="Times New Roman", size=10, bold=True)
-
-    # Re-add original body text
-    # for text in new_body:
-    #     para = doc.add_paragraph(text)
-    #     para.alignment = WD_PARAGRAPH_ALIGNMENT.JUSTIFY
-    for el in elements_to_keep:
-        doc.element.body.append(el)
-
-    # for text in new_body:
-    #     if text.strip():
-    #         para = doc.add_paragraph(text.strip())
-    #         para.alignment = WD_PARAGRAPH_ALIGNMENT.JUSTIFY
-    #         # para.paragraph_format.space_before = Pt(0)
-    #         # para.paragraph_format.space_after = Pt(0)
-
-    
-    layout_mode = "full_page"  # or "full_page", "two_column"
-    style_options = {
-        "font_name": "Times New Roman",
-        "font_size": 10,
-        "heading_font_size": 11,
-        "heading_color": "000000",
-        "heading_bg_color": "D9D9D9"
-    }
-    # process_body_content_with_styles(doc, journalCode=journalCode, )
-    process_body_content_with_styles(doc, layout_mode=layout_mode, style_options=style_options)
-    process_headings(doc)
-
-    # apply_two_column_layout_after_abstract(doc)
-    if layout_mode == "two_column":
-        for section in doc.sections:
-            apply_two_column_layout(section)
-        center_tables_and_images(doc)
-
-    doc.save(output_doc)
-    print(f"✔ Final document saved at: {output_doc}")
-    convert_docx_to_pdf(output_doc)
-    
 
 # ------------------- USAGE -------------------
 # process_document(
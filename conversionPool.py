@@ -0,0 +1,328 @@
+import atexit
+import os
+import queue
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from pathlib import Path
+from concurrent.futures import Future
+
+try:
+    import uno
+    from com.sun.star.beans import PropertyValue
+except ImportError:  # LibreOffice's Python bridge is not on every interpreter
+    uno = None
+    PropertyValue = None
+
+
+SOFFICE_BIN = os.environ.get("SOFFICE_BIN", "soffice")
+
+
+class ConversionError(Exception):
+    pass
+
+
+def _prop(name, value):
+    p = PropertyValue()
+    p.Name = name
+    p.Value = value
+    return p
+
+
+def pdf_path_for(input_path, output_dir):
+    # Same naming rule as `soffice --convert-to pdf --outdir`
+    base = os.path.splitext(os.path.basename(input_path))[0]
+    return os.path.join(output_dir, base + ".pdf")
+
+
+# -----------------------------------------------
+class _Job:
+    __slots__ = ("input_path", "output_dir", "deadline", "filter_data", "future")
+
+    def __init__(self, input_path, output_dir, deadline, filter_data=None):
+        self.input_path = input_path
+        self.output_dir = output_dir
+        self.deadline = deadline
+        self.filter_data = filter_data
+        self.future = Future()
+
+
+class _OfficeWorker(threading.Thread):
+    """One warm headless soffice with its own profile, fed from the pool queue."""
+
+    def __init__(self, pool, index):
+        super().__init__(name=f"soffice-worker-{index}", daemon=True)
+        self.pool = pool
+        self.index = index
+        self.pipe_name = f"docpool_{os.getpid()}_{index}_{id(self)}"
+        self.profile_dir = tempfile.mkdtemp(prefix=f"soffice_profile_{index}_")
+        self.process = None
+        self.desktop = None
+        self.jobs_done = 0
+        self.restarts = 0
+        self.busy_since = None
+        self._killed = False
+        # Held for every restart and for the idle check before a job, so the health check
+        # and the worker thread never restart the same profile/pipe concurrently
+        self.lifecycle = threading.RLock()
+
+    # ---------- office lifecycle ----------
+    def start_office(self):
+        profile_url = Path(self.profile_dir).resolve().as_uri()
+        self.process = subprocess.Popen([
+            self.pool.soffice_bin,
+            f"-env:UserInstallation={profile_url}",
+            "--headless", "--invisible", "--nologo", "--nodefault",
+            "--norestore", "--nolockcheck",
+            f"--accept=pipe,name={self.pipe_name};urp;StarOffice.ComponentContext",
+        ], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+        local_ctx = uno.getComponentContext()
+        resolver = local_ctx.ServiceManager.createInstanceWithContext(
+            "com.sun.star.bridge.UnoUrlResolver", local_ctx)
+        url = f"uno:pipe,name={self.pipe_name};urp;StarOffice.ComponentContext"
+        deadline = time.monotonic() + self.pool.startup_timeout
+        while True:
+            if self.process.poll() is not None:
+                raise ConversionError(f"soffice worker {self.index} exited during startup")
+            try:
+                ctx = resolver.resolve(url)
+                break
+            except Exception:
+                if time.monotonic() > deadline:
+                    self.kill_office()
+                    raise ConversionError(f"soffice worker {self.index} did not start in time")
+                time.sleep(0.25)
+        self.desktop = ctx.ServiceManager.createInstanceWithContext("com.sun.star.frame.Desktop", ctx)
+        self._killed = False
+
+    def kill_office(self):
+        self._killed = True
+        self.desktop = None
+        if self.process is not None and self.process.poll() is None:
+            self.process.kill()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                pass
+
+    def restart_office(self):
+        with self.lifecycle:
+            self.kill_office()
+            # A crashed instance can leave a locked or corrupt profile behind
+            shutil.rmtree(self.profile_dir, ignore_errors=True)
+            os.makedirs(self.profile_dir, exist_ok=True)
+            self.restarts += 1
+            self.start_office()
+
+    def is_alive_office(self):
+        if self.process is None or self.process.poll() is not None or self.desktop is None:
+            return False
+        if self.busy_since is not None:
+            return True  # don't probe the bridge while a conversion holds it
+        try:
+            self.desktop.getComponents()
+            return True
+        except Exception:
+            return False
+
+    # ---------- job loop ----------
+    def run(self):
+        while True:
+            job = self.pool.jobs.get()
+            if job is None:
+                self.pool.jobs.task_done()
+                break
+            try:
+                self.handle(job)
+            finally:
+                self.pool.jobs.task_done()
+        self.kill_office()
+        shutil.rmtree(self.profile_dir, ignore_errors=True)
+
+    def handle(self, job):
+        if not job.future.set_running_or_notify_cancel():
+            return
+        remaining = job.deadline - time.monotonic()
+        if remaining <= 0:
+            job.future.set_exception(TimeoutError(f"Deadline passed before {job.input_path} was picked up"))
+            return
+        with self.lifecycle:
+            try:
+                if not self.is_alive_office():
+                    self.restart_office()
+            except Exception as e:
+                job.future.set_exception(e)
+                return
+            # Marked busy before the lock is released, so health_check leaves this worker alone
+            self.busy_since = time.monotonic()
+
+        watchdog = threading.Timer(remaining, self.kill_office)
+        watchdog.daemon = True
+        watchdog.start()
+        try:
+            pdf_path = self.convert(job.input_path, job.output_dir, job.filter_data)
+        except Exception as e:
+            watchdog.cancel()
+            timed_out = self._killed
+            try:
+                self.restart_office()
+            except Exception as restart_error:
+                print(f"✖ soffice worker {self.index} restart failed:", restart_error)
+            if timed_out:
+                job.future.set_exception(TimeoutError(f"PDF conversion of {job.input_path} exceeded its deadline"))
+            else:
+                job.future.set_exception(ConversionError(f"PDF conversion of {job.input_path} failed: {e}"))
+            return
+        finally:
+            watchdog.cancel()
+            self.busy_since = None
+        self.jobs_done += 1
+        job.future.set_result(pdf_path)
+
+    def convert(self, input_path, output_dir, filter_data=None):
+        pdf_path = pdf_path_for(input_path, output_dir)
+        in_url = uno.systemPathToFileUrl(os.path.abspath(input_path))
+        out_url = uno.systemPathToFileUrl(os.path.abspath(pdf_path))
+        document = self.desktop.loadComponentFromURL(in_url, "_blank", 0, (_prop("Hidden", True),))
+        if document is None:
+            raise ConversionError("soffice could not open the document")
+        try:
+            args = (_prop("FilterName", "writer_pdf_Export"),)
+            if filter_data:
+                # FilterData must reach the bridge as a typed PropertyValue sequence
+                data = uno.Any("[]com.sun.star.beans.PropertyValue",
+                               tuple(_prop(k, v) for k, v in filter_data.items()))
+                args += (_prop("FilterData", data),)
+                uno.invoke(document, "storeToURL", (out_url, args))
+            else:
+                document.storeToURL(out_url, args)
+        finally:
+            document.close(True)
+        return pdf_path
+
+
+# -----------------------------------------------
+class ConversionPool:
+    """N warm headless LibreOffice instances serving DOCX -> PDF jobs from a queue."""
+
+    def __init__(self, size=2, job_timeout=120, startup_timeout=60, soffice_bin=None):
+        self.size = size
+        self.job_timeout = job_timeout
+        self.startup_timeout = startup_timeout
+        self.soffice_bin = soffice_bin or SOFFICE_BIN
+        self.jobs = queue.Queue()
+        self.workers = []
+        self.closed = False
+        self.pid = os.getpid()
+
+    @staticmethod
+    def is_supported(soffice_bin=None):
+        return uno is not None and shutil.which(soffice_bin or SOFFICE_BIN) is not None
+
+    def start(self):
+        try:
+            for i in range(self.size):
+                worker = _OfficeWorker(self, i)
+                worker.start_office()
+                worker.start()
+                self.workers.append(worker)
+        except Exception:
+            self.shutdown(wait=False)
+            raise
+        print(f"✔ Conversion pool started with {self.size} soffice worker(s)")
+        return self
+
+    def submit(self, input_path, output_dir=None, timeout=None, filter_data=None):
+        # filter_data: writer_pdf_Export options, e.g. {"Quality": 75} (see pdfProfiles)
+        if self.closed:
+            raise ConversionError("Conversion pool is shut down")
+        if not output_dir:
+            output_dir = os.path.dirname(os.path.abspath(input_path))
+        deadline = time.monotonic() + (timeout or self.job_timeout)
+        job = _Job(input_path, output_dir, deadline, filter_data)
+        self.jobs.put(job)
+        return job.future
+
+    def convert(self, input_path, output_dir=None, timeout=None, filter_data=None):
+        timeout = timeout or self.job_timeout
+        future = self.submit(input_path, output_dir, timeout, filter_data)
+        # Queue wait counts against the deadline too; the small margin lets the worker report first
+        return future.result(timeout=timeout + 5)
+
+    def health_check(self, restart=True):
+        report = []
+        for worker in self.workers:
+            with worker.lifecycle:
+                alive = worker.is_alive_office()
+                if not alive and restart and worker.busy_since is None:
+                    try:
+                        worker.restart_office()
+                        alive = True
+                    except Exception as e:
+                        print(f"✖ soffice worker {worker.index} restart failed:", e)
+            report.append({
+                "worker": worker.index,
+                "alive": alive,
+                "pid": worker.process.pid if worker.process else None,
+                "busy_for": time.monotonic() - worker.busy_since if worker.busy_since else 0.0,
+                "jobs_done": worker.jobs_done,
+                "restarts": worker.restarts,
+            })
+        return report
+
+    def healthy(self):
+        return not self.closed and any(w.is_alive_office() for w in self.workers)
+
+    def shutdown(self, wait=True):
+        if self.closed:
+            return
+        self.closed = True
+        for _ in self.workers:
+            self.jobs.put(None)
+        if wait:
+            for worker in self.workers:
+                worker.join(timeout=30)
+
+
+# ---------- process-wide default pool ----------
+_default_pool = None
+_default_pool_lock = threading.Lock()
+
+
+def start_default_pool(size=None, job_timeout=120):
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is not None and not _default_pool.closed:
+            return _default_pool
+        if size is None:
+            size = int(os.environ.get("SOFFICE_POOL_SIZE", "2"))
+        if size <= 0 or not ConversionPool.is_supported():
+            print("✖ Conversion pool unavailable (needs soffice and the uno module); using one-shot conversion")
+            return None
+        try:
+            _default_pool = ConversionPool(size=size, job_timeout=job_timeout).start()
+        except Exception as e:
+            print("✖ Conversion pool failed to start:", e)
+            _default_pool = None
+        return _default_pool
+
+
+def get_default_pool():
+    # A forked child inherits the object but not the worker threads or soffice processes
+    if _default_pool is not None and not _default_pool.closed and _default_pool.pid == os.getpid():
+        return _default_pool
+    return None
+
+
+def shutdown_default_pool():
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is not None:
+            _default_pool.shutdown()
+            _default_pool = None
+
+
+atexit.register(shutdown_default_pool)
@@ -0,0 +1,227 @@
+from docx.enum.style import WD_STYLE_TYPE
+from docx.enum.text import WD_PARAGRAPH_ALIGNMENT
+from docx.oxml import OxmlElement
+from docx.oxml.ns import qn
+from docx.shared import Pt, RGBColor
+
+
+# w:pPr children that come after w:shd in the schema sequence
+_SHD_SUCCESSORS = (
+    "w:tabs", "w:suppressAutoHyphens", "w:kinsoku", "w:wordWrap", "w:overflowPunct", "w:topLinePunct",
+    "w:autoSpaceDE", "w:autoSpaceDN", "w:bidi", "w:adjustRightInd", "w:snapToGrid", "w:spacing", "w:ind",
+    "w:contextualSpacing", "w:mirrorIndents", "w:suppressOverlap", "w:jc", "w:textDirection",
+    "w:textAlignment", "w:textboxTightWrap", "w:outlineLvl", "w:divId", "w:cnfStyle", "w:rPr", "w:sectPr",
+    "w:pPrChange",
+)
+
+# Run properties the journal styles define; removed from runs so the style shows through
+_BODY_RUN_PROPS = ("w:sz",)
+_HEADING_RUN_PROPS = ("w:b", "w:sz", "w:color")
+
+W_SHD = qn("w:shd")
+W_ASCII = qn("w:ascii")
+W_HANSI = qn("w:hAnsi")
+
+
+def set_shading(pPr, fill=None):
+    """Replace any w:shd on the paragraph with a single clear one, in schema order."""
+    for old in pPr.findall(W_SHD):
+        pPr.remove(old)
+    shd = OxmlElement("w:shd")
+    shd.set(qn("w:val"), "clear")
+    shd.set(qn("w:color"), "auto")
+    if fill:
+        shd.set(qn("w:fill"), fill)
+    pPr.insert_element_before(shd, *_SHD_SUCCESSORS)
+    return shd
+
+
+# -----------------------------------------------
+# Prefixed names keep clear of the manuscript's own "Title", "Heading 1", ... styles
+JOURNAL_STYLE_NAMES = {
+    "body": "Journal Body",
+    "reference": "Journal Reference",
+    "heading": "Journal Heading",
+    "abstract_heading": "Journal Abstract Heading",
+    "subheading": "Journal Subheading",
+    "title": "Journal Title",
+    "authors": "Journal Authors",
+    "affiliation": "Journal Affiliation",
+    "corresponding": "Journal Corresponding",
+}
+
+
+def journal_style_specs(style_options):
+    """Paragraph styles matching what direct formatting produces, keyed by role."""
+    font = style_options.get("font_name", "Times New Roman")
+    body_size = style_options.get("font_size", 10)
+    heading_size = style_options.get("heading_font_size", 11)
+    color = style_options.get("heading_color", "000000")
+    center = WD_PARAGRAPH_ALIGNMENT.CENTER
+    specs = {
+        "body": dict(font=font, size=body_size, align=WD_PARAGRAPH_ALIGNMENT.JUSTIFY),
+        "reference": dict(font=font, size=body_size, align=WD_PARAGRAPH_ALIGNMENT.JUSTIFY),
+        "heading": dict(font=font, size=heading_size, bold=True, color=color, align=center),
+        "abstract_heading": dict(font=font, size=heading_size, bold=True, color=color, align=center,
+                                 shading=style_options.get("heading_bg_color", "E6E6E6")),
+        "subheading": dict(font=font, size=10, bold=True, color=color, align=WD_PARAGRAPH_ALIGNMENT.LEFT),
+        # Title block, as style_paragraph1 writes it
+        "title": dict(font="Georgia", size=16, bold=True, align=center),
+        "authors": dict(font="Times New Roman", size=14, bold=False, align=center),
+        "affiliation": dict(font="Antiqua", size=11, bold=False, align=center),
+        "corresponding": dict(font="Times New Roman", size=10, bold=True, align=center),
+    }
+    for role, spec in specs.items():
+        spec["name"] = JOURNAL_STYLE_NAMES[role]
+    return specs
+
+
+def ensure_journal_styles(doc, style_options):
+    """Define (or redefine in place) the journal paragraph styles; returns {role: style_id}.
+
+    Running it again on an already formatted document rewrites the same definitions
+    instead of adding new ones.
+    """
+    styles = doc.styles
+    base = next((s for s in styles if s.type == WD_STYLE_TYPE.PARAGRAPH and s.style_id == "Normal"), None)
+    ids = {}
+    for role, spec in journal_style_specs(style_options).items():
+        existing = next((s for s in styles if s.name == spec["name"]), None)
+        if existing is None:
+            style = styles.add_style(spec["name"], WD_STYLE_TYPE.PARAGRAPH)
+        else:
+            style = existing
+            for child in (style.element.pPr, style.element.rPr):
+                if child is not None:
+                    style.element.remove(child)
+        style.base_style = base
+        style.quick_style = True
+        style.paragraph_format.alignment = spec["align"]
+        style.font.name = spec["font"]
+        style.font.size = Pt(spec["size"])
+        if "bold" in spec:
+            style.font.bold = spec["bold"]
+        if spec.get("color"):
+            style.font.color.rgb = RGBColor.from_string(spec["color"])
+        if spec.get("shading"):
+            set_shading(style.element.get_or_add_pPr(), spec["shading"])
+        ids[role] = style.style_id
+    return ids
+
+
+def _default_size(doc):
+    # Run size from w:docDefaults, the last step of style inheritance
+    sz = doc.styles.element.find(qn("w:docDefaults") + "/" + qn("w:rPrDefault") + "/" + qn("w:rPr") + "/" + qn("w:sz"))
+    return Pt(int(sz.get(qn("w:val"))) / 2) if sz is not None else None
+
+
+# -----------------------------------------------
+class StyleStyler:
+    """Body styling by paragraph style ID instead of per-run properties.
+
+    Each call sets w:pStyle and strips the direct paragraph/run formatting the style
+    defines, so repeated passes leave exactly one property of each kind. Uses the
+    journal styles already in the document (see ensure_journal_styles), defining
+    them with default options if they are missing.
+
+    The heading styles stand in for setters that only touch the first run, so the
+    later runs of a heading keep the bold and size they had as direct formatting.
+
+    Only paragraphs in the default style (or already in a journal style) are restyled;
+    see owns(). Callers format the rest directly so they keep the author's style.
+    """
+
+    def __init__(self, doc):
+        by_name = {s.name: s.style_id for s in doc.styles if s.type == WD_STYLE_TYPE.PARAGRAPH}
+        if any(name not in by_name for name in JOURNAL_STYLE_NAMES.values()):
+            self.ids = ensure_journal_styles(doc, {})
+        else:
+            self.ids = {role: by_name[name] for role, name in JOURNAL_STYLE_NAMES.items()}
+        self.styles = {s.style_id: s for s in doc.styles if s.type == WD_STYLE_TYPE.PARAGRAPH}
+        self.default_style = doc.styles.default(WD_STYLE_TYPE.PARAGRAPH)
+        self.default_size = _default_size(doc)
+        self._looks = {}
+        self._own_ids = set(self.ids.values())
+        self._own_ids.add(None)
+        if self.default_style is not None:
+            self._own_ids.add(self.default_style.style_id)
+
+    def owns(self, p):
+        """True when `p` has no style of its own (Normal or a journal style), so set_style may replace it."""
+        pPr = p.pPr
+        return (pPr.style if pPr is not None else None) in self._own_ids
+
+    def style_look(self, style_id):
+        """(bold, size) a run without direct formatting gets from paragraph style `style_id`."""
+        look = self._looks.get(style_id)
+        if look is None:
+            style = self.styles.get(style_id, self.default_style)
+            bold = size = None
+            while style is not None and (bold is None or size is None):
+                bold = style.font.bold if bold is None else bold
+                size = style.font.size if size is None else size
+                style = style.base_style
+            look = self._looks[style_id] = (bool(bold), size or self.default_size)
+        return look
+
+    def set_style(self, p, role, run_props=(), first_run_only=False):
+        pPr = p.get_or_add_pPr()
+        if first_run_only:
+            # Pin what the later runs look like now, before the new style would change it
+            bold, size = self.style_look(pPr.style)
+            for r in p.r_lst[1:]:
+                rPr = r.get_or_add_rPr()
+                if rPr.b is None:
+                    rPr._set_bool_val("b", bold)
+                if rPr.sz is None and size is not None:
+                    rPr.sz_val = size
+        pPr.get_or_add_pStyle().val = self.ids[role]
+        pPr._remove_jc()
+        for shd in pPr.findall(W_SHD):
+            pPr.remove(shd)
+        for i, r in enumerate(p.r_lst):
+            rPr = r.rPr
+            if rPr is None or (first_run_only and i):
+                continue
+            rFonts = rPr.rFonts
+            if rFonts is not None:
+                rFonts.attrib.pop(W_ASCII, None)
+                rFonts.attrib.pop(W_HANSI, None)
+                if not len(rFonts.attrib):
+                    rPr._remove_rFonts()
+            for tag in run_props:
+                for el in rPr.findall(qn(tag)):
+                    rPr.remove(el)
+            if not len(rPr) and not len(rPr.attrib):
+                r.remove(rPr)
+        return len(p.r_lst)
+
+    def role_of(self, p):
+        pPr = p.pPr
+        style_id = pPr.style if pPr is not None else None
+        return next((role for role, sid in self.ids.items() if sid == style_id), None)
+
+    def add_paragraph(self, doc, text, role, before=None):
+        # style_paragraph1 equivalent for the title block
+        para = doc.add_paragraph()
+        if before is not None:
+            before.addprevious(para._element)
+        para._element.get_or_add_pPr().get_or_add_pStyle().val = self.ids[role]
+        para.add_run(text)
+        return para
+
+    # ---------- bodyParser equivalents ----------
+    def font_style(self, p, reference=False):
+        return self.set_style(p, "reference" if reference else "body", _BODY_RUN_PROPS)
+
+    def heading_style(self, p, background_color=False):
+        return self.set_style(p, "abstract_heading" if background_color else "heading", _HEADING_RUN_PROPS,
+                              first_run_only=True)
+
+    def style_paragraph(self, p, align_center=True):
+        # process_headings: centred candidates are headings, the rest subheadings;
+        # an abstract heading already carries the heading look plus its shading
+        if align_center and self.role_of(p) == "abstract_heading":
+            return 1
+        return self.set_style(p, "heading" if align_center else "subheading", _HEADING_RUN_PROPS,
+                              first_run_only=True)
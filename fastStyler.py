@@ -0,0 +1,133 @@
+from copy import deepcopy
+
+from lxml import etree
+
+from docx.dml.color import RGBColor
+from docx.enum.text import WD_PARAGRAPH_ALIGNMENT
+from docx.oxml import OxmlElement
+from docx.oxml.ns import nsmap, qn
+from docx.shared import Pt
+
+from documentStyles import set_shading
+
+
+# Precompiled lookups used on every paragraph/run
+_runs = etree.XPath("./w:r", namespaces=nsmap)
+_first_run = etree.XPath("./w:r[1]", namespaces=nsmap)
+
+W_VAL = qn("w:val")
+W_ASCII = qn("w:ascii")
+W_HANSI = qn("w:hAnsi")
+
+JUSTIFY = WD_PARAGRAPH_ALIGNMENT.to_xml(WD_PARAGRAPH_ALIGNMENT.JUSTIFY)
+CENTER = WD_PARAGRAPH_ALIGNMENT.to_xml(WD_PARAGRAPH_ALIGNMENT.CENTER)
+LEFT = WD_PARAGRAPH_ALIGNMENT.to_xml(WD_PARAGRAPH_ALIGNMENT.LEFT)
+
+
+def half_points(size):
+    # Same rounding as python-docx's ST_HpsMeasure
+    return str(int(Pt(size).pt * 2))
+
+
+# -----------------------------------------------
+class LxmlStyler:
+    """Body styling on raw w:p elements; XML output matches the python-docx setter path exactly.
+
+    Each method mirrors one function in bodyParser (apply_font_style, apply_heading_style,
+    style_paragraph) call for call, but skips the Paragraph/Run/Font wrapper objects and
+    stamps prebuilt rPr templates onto runs that have no properties yet.
+    """
+
+    def __init__(self, style_options):
+        self.font_name = style_options.get("font_name", "Times New Roman")
+        self.font_size = half_points(style_options.get("font_size", 10))
+        self.heading_size = half_points(style_options.get("heading_font_size", 11))
+        self.heading_color = style_options.get("heading_color", "000000")
+        self.heading_bg_color = style_options.get("heading_bg_color", "E6E6E6")
+        self.body_rPr = self._rPr_template(self.font_name, self.font_size)
+
+        self._rgb = {}
+
+    @staticmethod
+    def _rPr_template(font_name, size_val):
+        rPr = OxmlElement("w:rPr")
+        rFonts = OxmlElement("w:rFonts")
+        rFonts.set(W_ASCII, font_name)
+        rFonts.set(W_HANSI, font_name)
+        rPr.append(rFonts)
+        sz = OxmlElement("w:sz")
+        sz.set(W_VAL, size_val)
+        rPr.append(sz)
+        return rPr
+
+    # ---------- primitives ----------
+    @staticmethod
+    def set_alignment(p, jc_val):
+        p.get_or_add_pPr().get_or_add_jc().set(W_VAL, jc_val)
+
+    @staticmethod
+    def set_font_name(rPr, font_name):
+        rFonts = rPr.get_or_add_rFonts()
+        rFonts.set(W_ASCII, font_name)
+        rFonts.set(W_HANSI, font_name)
+
+    @staticmethod
+    def set_font_size(rPr, size_val):
+        rPr.get_or_add_sz().set(W_VAL, size_val)
+
+    @staticmethod
+    def set_bold(rPr, bold):
+        b = rPr.get_or_add_b()
+        if bold:
+            b.attrib.pop(W_VAL, None)
+        else:
+            b.set(W_VAL, "0")
+
+    @staticmethod
+    def first_run(p):
+        runs = _first_run(p)
+        return runs[0] if runs else p.add_r()
+
+    def rgb(self, color):
+        val = self._rgb.get(color)
+        if val is None:
+            val = self._rgb[color] = str(RGBColor.from_string(color))
+        return val
+
+    # ---------- bodyParser equivalents ----------
+    def font_style(self, p):
+        # apply_font_style: justify, then body font name and size on every run
+        self.set_alignment(p, JUSTIFY)
+        runs = _runs(p)
+        for r in runs:
+            rPr = r.rPr
+            if rPr is None:
+                r._insert_rPr(deepcopy(self.body_rPr))
+            else:
+                self.set_font_name(rPr, self.font_name)
+                self.set_font_size(rPr, self.font_size)
+        return len(runs)
+
+    def heading_style(self, p, background_color=False):
+        # apply_heading_style
+        r = self.first_run(p)
+        rPr = r.get_or_add_rPr()
+        self.set_bold(rPr, True)
+        self.set_font_size(rPr, self.heading_size)
+        self.set_font_name(rPr, self.font_name)
+        self.set_alignment(p, CENTER)
+        set_shading(p.get_or_add_pPr(), self.heading_bg_color if background_color else None)
+        rPr._remove_color()
+        rPr.get_or_add_color().set(W_VAL, self.heading_color)
+
+    def style_paragraph(self, p, font_name, size, bold=False, color=None, align_center=True):
+        # style_paragraph
+        self.set_alignment(p, CENTER if align_center else LEFT)
+        r = self.first_run(p)
+        rPr = r.get_or_add_rPr()
+        self.set_font_name(rPr, font_name)
+        self.set_font_size(rPr, half_points(size))
+        self.set_bold(rPr, bold)
+        if color:
+            rPr._remove_color()
+            rPr.get_or_add_color().set(W_VAL, self.rgb(color))
@@ -0,0 +1,173 @@
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from lxml import etree
+from PIL import Image
+
+from docx.opc.constants import CONTENT_TYPE as CT
+from docx.opc.packuri import PackURI
+from docx.oxml.ns import nsmap, qn
+from docx.parts.image import ImagePart
+
+import instrumentation
+
+
+EMU_PER_INCH = 914400
+
+# Pictures are sized from pic:spPr when present (the drawn size), else from the wp:extent frame
+_blips = etree.XPath(".//a:blip[@r:embed]", namespaces=nsmap)
+_pic_ext = etree.XPath("ancestor::pic:pic[1]/pic:spPr/a:xfrm/a:ext", namespaces=nsmap)
+_frame_ext = etree.XPath("ancestor::wp:inline[1]/wp:extent | ancestor::wp:anchor[1]/wp:extent", namespaces=nsmap)
+_src_rect = etree.XPath("../a:srcRect", namespaces=nsmap)
+_vml_images = etree.XPath(".//v:imagedata/@r:id", namespaces=dict(nsmap, v="urn:schemas-microsoft-com:vml"))
+
+FORMATS = {
+    "JPEG": ("jpeg", CT.JPEG),
+    "PNG": ("png", CT.PNG),
+}
+
+
+# -----------------------------------------------
+def _display_sizes(package):
+    """Largest drawn size in inches of every image part, and the image parts that cannot be sized safely."""
+    sizes = {}
+    unsized = set()
+    for part in package.iter_parts():
+        element = getattr(part, "_element", None)
+        if element is None:
+            continue
+        rels = part.rels
+        for rId in _vml_images(element):
+            rel = rels.get(rId)
+            if rel is not None and not rel.is_external:
+                unsized.add(rel.target_part)
+        for blip in _blips(element):
+            rel = rels.get(blip.get(qn("r:embed")))
+            if rel is None or rel.is_external or not isinstance(rel.target_part, ImagePart):
+                continue
+            ext = _pic_ext(blip) or _frame_ext(blip)
+            if not ext:
+                unsized.add(rel.target_part)
+                continue
+            width = int(ext[0].get("cx", 0)) / EMU_PER_INCH
+            height = int(ext[0].get("cy", 0)) / EMU_PER_INCH
+            # A cropped picture shows only part of the image, so the whole image needs more pixels
+            for rect in _src_rect(blip):
+                width /= max(0.05, 1 - (int(rect.get("l", 0)) + int(rect.get("r", 0))) / 100000)
+                height /= max(0.05, 1 - (int(rect.get("t", 0)) + int(rect.get("b", 0))) / 100000)
+            old = sizes.get(rel.target_part, (0.0, 0.0))
+            sizes[rel.target_part] = (max(old[0], width), max(old[1], height))
+    for part in unsized:
+        sizes.pop(part, None)
+    return sizes
+
+
+def _choose_format(img, source_format, image_format):
+    if image_format in ("JPEG", "PNG"):
+        return image_format
+    has_alpha = img.mode in ("RGBA", "LA", "PA") or (img.mode == "P" and "transparency" in img.info)
+    if image_format == "KEEP" and source_format in FORMATS:
+        return source_format
+    # auto: photos become JPEG; transparency and flat-colour diagrams stay PNG
+    if has_alpha:
+        return "PNG"
+    if source_format == "PNG" and img.getcolors(maxcolors=256) is not None:
+        return "PNG"
+    return "JPEG"
+
+
+def recompress_image(blob, display_inches, dpi=150, quality=80, image_format="auto", min_saving=0.1):
+    """Resample one image to `dpi` at its display size and re-encode it.
+
+    Returns (new_blob, pil_format) or None when the result would not save at least `min_saving`.
+    Never upscales; EXIF data is carried over so orientation tags keep working.
+    """
+    try:
+        img = Image.open(io.BytesIO(blob))
+        source_format = img.format
+        img.load()
+    except Exception:
+        return None  # EMF/WMF/SVG and anything else Pillow cannot rasterize stay as they are
+
+    target_w = max(1, round(display_inches[0] * dpi))
+    target_h = max(1, round(display_inches[1] * dpi))
+    # Rotated EXIF images are drawn with width and height swapped
+    orientation = img.getexif().get(0x0112, 1)
+    if orientation in (5, 6, 7, 8):
+        target_w, target_h = target_h, target_w
+    scale = max(target_w / img.width, target_h / img.height)
+    if scale < 1:
+        img = img.resize((max(1, round(img.width * scale)), max(1, round(img.height * scale))), Image.LANCZOS)
+
+    out_format = _choose_format(img, source_format, image_format.upper())
+    options = {"dpi": (dpi, dpi)}
+    if img.info.get("exif"):
+        options["exif"] = img.info["exif"]
+    if out_format == "JPEG":
+        if img.mode not in ("RGB", "L"):
+            rgba = img.convert("RGBA")
+            img = Image.new("RGB", rgba.size, (255, 255, 255))
+            img.paste(rgba, mask=rgba.getchannel("A"))
+        options.update(quality=quality, optimize=True, progressive=True)
+    else:
+        options.update(optimize=True)
+
+    buffer = io.BytesIO()
+    img.save(buffer, out_format, **options)
+    new_blob = buffer.getvalue()
+    if len(new_blob) > len(blob) * (1 - min_saving):
+        return None
+    return new_blob, out_format
+
+
+def _rename_part(part, ext, taken):
+    stem = os.path.splitext(part.partname)[0]
+    candidate = f"{stem}.{ext}"
+    n = 1
+    while candidate in taken:
+        candidate = f"{stem}_{n}.{ext}"
+        n += 1
+    taken.add(candidate)
+    part.partname = PackURI(candidate)
+
+
+def optimize_images(doc, dpi=150, quality=80, image_format="auto", max_workers=None, min_bytes=50 * 1024):
+    """Downsample and recompress the document's image parts in place; returns a bytes-saved report.
+
+    Parts smaller than `min_bytes`, linked images and pictures without a known display size are skipped.
+    """
+    package = doc.part.package
+    sizes = _display_sizes(package)
+    candidates = [part for part in sizes if len(part.blob) >= min_bytes]
+    report = {"images": len(sizes), "optimized": 0, "bytes_before": 0, "bytes_after": 0, "bytes_saved": 0, "parts": []}
+    if not candidates:
+        return report
+
+    def work(part):
+        return part, recompress_image(part.blob, sizes[part], dpi=dpi, quality=quality, image_format=image_format)
+
+    # Pillow releases the GIL while decoding, resampling and encoding, so threads scale here
+    taken = {str(p.partname) for p in package.iter_parts()}
+    with ThreadPoolExecutor(max_workers=max_workers or min(8, os.cpu_count() or 1)) as executor:
+        for part, result in executor.map(work, candidates):
+            before = len(part.blob)
+            report["bytes_before"] += before
+            if result is None:
+                report["bytes_after"] += before
+                continue
+            new_blob, out_format = result
+            ext, content_type = FORMATS[out_format]
+            part._blob = new_blob
+            part._image = None
+            if content_type != part.content_type:
+                part._content_type = content_type
+                _rename_part(part, ext, taken)
+            report["optimized"] += 1
+            report["bytes_after"] += len(new_blob)
+            report["parts"].append({"partname": str(part.partname), "before": before, "after": len(new_blob)})
+
+    report["bytes_saved"] = report["bytes_before"] - report["bytes_after"]
+    instrumentation.count("images_optimized", report["optimized"])
+    instrumentation.count("image_bytes_saved", report["bytes_saved"])
+    return report
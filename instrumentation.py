@@ -0,0 +1,159 @@
+import cProfile
+import contextvars
+import io
+import json
+import pstats
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+
+# Hooks called for every recorder: hook(event, payload) with event in
+# "span_start", "span_end", "count". Add with register_hook().
+_global_hooks = []
+
+_current = contextvars.ContextVar("docformatter_recorder", default=None)
+
+
+def register_hook(hook):
+    _global_hooks.append(hook)
+    return hook
+
+
+def unregister_hook(hook):
+    if hook in _global_hooks:
+        _global_hooks.remove(hook)
+
+
+# -----------------------------------------------
+class RunRecorder:
+    """Timing spans, counters and an optional cProfile capture for one pipeline run."""
+
+    def __init__(self, hooks=None, profile=False, name="process_document"):
+        self.name = name
+        self.hooks = list(hooks or [])
+        self.spans = []
+        self.counters = Counter()
+        self.started_at = time.time()
+        self._t0 = time.perf_counter()
+        self._depth = 0
+        self._lock = threading.Lock()
+        self.profiler = cProfile.Profile() if profile else None
+        self._profiling = False
+
+    def _emit(self, event, payload):
+        for hook in self.hooks + _global_hooks:
+            try:
+                hook(event, payload)
+            except Exception as e:  # a broken hook must not break formatting
+                print(f"✖ Instrumentation hook {hook!r} failed:", e)
+
+    @contextmanager
+    def span(self, name, **attrs):
+        record = {"name": name, "start": time.perf_counter() - self._t0, "duration": None,
+                  "depth": self._depth, "attrs": attrs}
+        self._emit("span_start", record)
+        self._depth += 1
+        started = time.perf_counter()
+        try:
+            yield record
+        finally:
+            self._depth -= 1
+            record["duration"] = time.perf_counter() - started
+            with self._lock:
+                self.spans.append(record)
+            self._emit("span_end", record)
+
+    def count(self, name, value=1):
+        with self._lock:
+            self.counters[name] += value
+        self._emit("count", {"name": name, "value": value})
+
+    def stage_totals(self):
+        totals = {}
+        for span in self.spans:
+            totals[span["name"]] = totals.get(span["name"], 0.0) + span["duration"]
+        return totals
+
+    def report(self):
+        return {
+            "name": self.name,
+            "started": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started_at)),
+            "elapsed_seconds": time.perf_counter() - self._t0,
+            "stages": self.stage_totals(),
+            "spans": sorted(self.spans, key=lambda s: s["start"]),
+            "counters": dict(self.counters),
+        }
+
+    def write_report(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, indent=2, default=str)
+        return path
+
+    # ---------- cProfile ----------
+    def start_profile(self):
+        if self.profiler is not None and not self._profiling:
+            self.profiler.enable()
+            self._profiling = True
+            return True
+        return False
+
+    def stop_profile(self):
+        if self._profiling:
+            self.profiler.disable()
+            self._profiling = False
+
+    def profile_stats(self, sort="cumulative", limit=30):
+        if self.profiler is None:
+            return ""
+        out = io.StringIO()
+        pstats.Stats(self.profiler, stream=out).sort_stats(sort).print_stats(limit)
+        return out.getvalue()
+
+    def dump_profile(self, path):
+        if self.profiler is not None:
+            self.profiler.dump_stats(path)
+        return path
+
+
+class _NullRecorder:
+    # Stand-in when no recorder is active; keeps call sites free of None checks
+    @contextmanager
+    def span(self, name, **attrs):
+        yield None
+
+    def count(self, name, value=1):
+        pass
+
+
+_NULL = _NullRecorder()
+
+
+# ---------- context helpers ----------
+def current():
+    return _current.get() or _NULL
+
+
+@contextmanager
+def use_recorder(recorder):
+    """Make `recorder` the active one for this thread/context; None keeps whatever is active."""
+    if recorder is None:
+        yield current()
+        return
+    token = _current.set(recorder)
+    started_profile = recorder.start_profile()
+    try:
+        yield recorder
+    finally:
+        if started_profile:
+            recorder.stop_profile()
+        _current.reset(token)
+
+
+def span(name, **attrs):
+    return current().span(name, **attrs)
+
+
+def count(name, value=1):
+    current().count(name, value)
@@ -0,0 +1,205 @@
+import argparse
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from pypdf import PdfReader, PdfWriter
+
+from batchRunner import load_manifest, run_batch
+from conversionPool import ConversionError
+from bodyParser import convert_docx_to_pdf, load_document, set_page_numbering
+from packageWriter import save_document
+
+
+# -----------------------------------------------
+def page_count(pdf_path):
+    return len(PdfReader(pdf_path).pages)
+
+
+def estimated_pages(docx_path):
+    """Page count Word stored in docProps/app.xml, or None; only a first guess at the formatted length."""
+    try:
+        with zipfile.ZipFile(docx_path) as z:
+            match = re.search(rb"<Pages>(\d+)</Pages>", z.read("docProps/app.xml"))
+    except (KeyError, OSError, zipfile.BadZipFile):
+        return None
+    return int(match.group(1)) if match and int(match.group(1)) > 0 else None
+
+
+def start_pages(first_page, pages):
+    # Start page of each article when they follow each other without gaps
+    starts = []
+    page = first_page
+    for count in pages:
+        starts.append(page)
+        page += count
+    return starts
+
+
+def renumber_job(docx_path, start_page_number, scratch_root=None, pdf_profile="default"):
+    """Restamp the page-number start on an already formatted article and convert it again; returns the PDF path."""
+    scratch = tempfile.mkdtemp(prefix="issue_", dir=scratch_root)
+    try:
+        doc = load_document(docx_path)
+        set_page_numbering(doc, start_page_number)
+        save_document(doc, docx_path)
+        pdf_path = convert_docx_to_pdf(docx_path, scratch, profile_dir=os.path.join(scratch, "profile"),
+                                       pdf_profile=pdf_profile)
+        if not pdf_path or not os.path.exists(pdf_path):
+            return None
+        final_pdf = os.path.splitext(docx_path)[0] + ".pdf"
+        shutil.move(pdf_path, final_pdf)
+        return final_pdf
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+def paginate(entries, first_page):
+    # Continuous start/end pages from each entry's page count
+    for entry, start in zip(entries, start_pages(first_page, [e["pages"] for e in entries])):
+        entry["start_page"] = start
+        entry["end_page"] = start + entry["pages"] - 1
+
+
+def merge_pdfs(entries, output_pdf):
+    """Concatenate article PDFs page by page (no re-rendering), with one bookmark per article."""
+    writer = PdfWriter()
+    for entry in entries:
+        writer.append(entry["pdf"], outline_item=f"{entry['start_page']} {entry['title']}")
+    with open(output_pdf, "wb") as f:
+        writer.write(f)
+    writer.close()
+    return output_pdf
+
+
+# -----------------------------------------------
+def assemble_issue(jobs, output_pdf, first_page=1, workers=None, scratch_root=None, known_pages=None,
+                   on_result=None):
+    """Format and convert the articles of an issue in parallel, paginate them continuously, merge one PDF.
+
+    Pass 1 runs every job through batchRunner with a provisional start page taken from `known_pages`
+    (id -> pages from an earlier run) or the page count Word stored in the input. The PDFs give the real
+    page counts; articles whose provisional start turns out wrong get the right one stamped onto their
+    DOCX and are converted again in pass 2. Wider page numbers can reflow an article to a different
+    length, so pass 2 repeats until every stamped start matches the pagination. Returns a report with
+    the table of contents.
+    """
+    started = time.perf_counter()
+    known_pages = known_pages or {}
+    workers = workers or os.cpu_count() or 1
+    guesses = [known_pages.get(job["id"]) or estimated_pages(job["input"]) or 1 for job in jobs]
+    provisional = start_pages(first_page, guesses)
+
+    pass1 = run_batch([dict(job, start_page_number=start) for job, start in zip(jobs, provisional)],
+                      workers=workers, scratch_root=scratch_root, on_result=on_result)
+    pass1_seconds = time.perf_counter() - started
+
+    entries = []
+    failed = []
+    for job, result, start in zip(jobs, pass1["results"], provisional):
+        if result["status"] != "ok":
+            failed.append({"id": job["id"], "status": result["status"], "error": result.get("error")})
+            continue
+        entries.append({"id": job["id"], "title": job.get("title") or job["id"], "docx": result["output_docx"],
+                        "pdf": result["output_pdf"], "stamped_start": start, "pages": page_count(result["output_pdf"])})
+
+    # Failed articles are left out, so the pages close up behind them
+    paginate(entries, first_page)
+
+    stale = [e for e in entries if e["start_page"] != e["stamped_start"]]
+    renumbered = set()
+    rounds = 0
+    pass2_started = time.perf_counter()
+    if stale:
+        by_id = {job["id"]: job for job in jobs}
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # Each round settles at least the first stale article for good (its start only depends
+            # on the articles before it), so this ends after at most len(entries) rounds
+            while stale:
+                rounds += 1
+                futures = {executor.submit(renumber_job, e["docx"], e["start_page"], scratch_root,
+                                           by_id[e["id"]].get("pdf_profile", "default")): e
+                           for e in stale}
+                for future in as_completed(futures):
+                    entry = futures[future]
+                    entry["pdf"] = future.result()
+                    if entry["pdf"] is None:
+                        raise ConversionError(f"PDF conversion failed while renumbering {entry['id']}")
+                    entry["stamped_start"] = entry["start_page"]
+                    renumbered.add(entry["id"])
+                    pages = page_count(entry["pdf"])
+                    if pages != entry["pages"]:
+                        # Wider page numbers reflowed the article; everything after it moves
+                        print(f"✖ {entry['id']}: {entry['pages']} pages before renumbering, {pages} after; repaginating")
+                        entry["pages"] = pages
+                paginate(entries, first_page)
+                stale = [e for e in entries if e["start_page"] != e["stamped_start"]]
+    pass2_seconds = time.perf_counter() - pass2_started
+
+    merge_started = time.perf_counter()
+    if entries:
+        os.makedirs(os.path.dirname(os.path.abspath(output_pdf)), exist_ok=True)
+        merge_pdfs(entries, output_pdf)
+    merge_seconds = time.perf_counter() - merge_started
+
+    return {
+        "output_pdf": output_pdf if entries else None,
+        "articles": len(jobs),
+        "merged": len(entries),
+        "failed": failed,
+        "pages": sum(e["pages"] for e in entries),
+        "renumbered": len(renumbered),
+        "renumber_rounds": rounds,
+        "toc": [{k: e[k] for k in ("id", "title", "start_page", "end_page", "pages", "pdf")} for e in entries],
+        "timings": {"pass1": pass1_seconds, "pass2": pass2_seconds, "merge": merge_seconds,
+                    "total": time.perf_counter() - started},
+        "workers": workers,
+    }
+
+
+# ------------------- CLI -------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build one continuously paginated issue PDF from a manifest of articles.")
+    parser.add_argument("manifest", help="batchRunner manifest; jobs in issue order")
+    parser.add_argument("--output", required=True, help="issue PDF to write")
+    parser.add_argument("--first-page", type=int, default=1)
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per core)")
+    parser.add_argument("--output-dir", default=None, help="directory for per-article outputs")
+    parser.add_argument("--scratch-dir", default=None, help="root for per-job scratch directories")
+    parser.add_argument("--pages", default=None, help="JSON report of an earlier run; its page counts seed the start pages")
+    parser.add_argument("--report", default=None, help="write the JSON issue report (table of contents) here")
+    args = parser.parse_args(argv)
+
+    jobs = load_manifest(args.manifest, output_dir=args.output_dir)
+    known_pages = None
+    if args.pages:
+        with open(args.pages, encoding="utf-8") as f:
+            known_pages = {e["id"]: e["pages"] for e in json.load(f)["toc"]}
+
+    def progress(result):
+        mark = "✔" if result["status"] == "ok" else "✖"
+        print(f"{mark} {result['id']}: {result['status']} in {result['timings'].get('total', 0):.2f}s")
+
+    report = assemble_issue(jobs, args.output, first_page=args.first_page, workers=args.workers,
+                            scratch_root=args.scratch_dir, known_pages=known_pages, on_result=progress)
+    timings = report["timings"]
+    print(f"✔ Issue assembled: {report['merged']}/{report['articles']} articles, {report['pages']} pages, "
+          f"{report['renumbered']} renumbered, in {timings['total']:.1f}s "
+          f"(pass 1 {timings['pass1']:.1f}s, pass 2 {timings['pass2']:.1f}s, merge {timings['merge']:.1f}s)")
+    if report["output_pdf"]:
+        print(f"✔ Issue PDF saved at: {report['output_pdf']}")
+
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"✔ Report written to: {args.report}")
+    return 0 if not report["failed"] else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,241 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from bodyParser import PIPELINE_VERSION
+from instrumentation import RunRecorder
+from preflight import FAST, HEAVY, PreflightRejected, preflight
+from resultCache import cache_key
+from stagedPipeline import StagedPipeline
+
+
+DEFAULT_WORKSPACE_DIR = os.environ.get("JOB_WORKSPACE_DIR", os.path.join(tempfile.gettempdir(), "docformatter_jobs"))
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+# Share of the progress bar reached when each pipeline span ends
+STAGE_PROGRESS = {
+    "load": 0.10,
+    "normalize": 0.12,
+    "images": 0.15,
+    "header_footer": 0.20,
+    "title_block": 0.30,
+    "body_rebuild": 0.35,
+    "body_styling": 0.55,
+    "headings": 0.60,
+    "layout": 0.65,
+    "save": 0.70,
+    "pdf": 1.00,
+}
+
+
+class QueueFull(Exception):
+    """Raised by JobQueue.submit when every worker is busy and the waiting line is at its limit."""
+
+
+# -----------------------------------------------
+class Job:
+    def __init__(self, job_id, key, workspace, lane=FAST):
+        self.id = job_id
+        self.key = key
+        self.workspace = workspace
+        self.lane = lane
+        self.preflight = None
+        self.status = QUEUED
+        self.stage = None
+        self.progress = 0.0
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.docx = None
+        self.pdf = None
+        self.cache_hit = False
+        self.stages = None
+        self.error = None
+        self.report = None
+        self._done = threading.Event()
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        return self._done.wait(timeout)
+
+    def _on_event(self, event, payload):
+        # Recorder hook: runs on the worker thread while the pipeline executes
+        if event == "span_start" and payload["name"] in STAGE_PROGRESS:
+            self.stage = payload["name"]
+        elif event == "span_end":
+            self.progress = max(self.progress, STAGE_PROGRESS.get(payload["name"], 0.0))
+
+    def snapshot(self):
+        now = time.time()
+        return {
+            "id": self.id,
+            "status": self.status,
+            "lane": self.lane,
+            "stage": self.stage,
+            "progress": self.progress,
+            "cache_hit": self.cache_hit,
+            "stages": self.stages,
+            "error": self.error,
+            "wait_seconds": (self.started_at or now) - self.submitted_at,
+            "run_seconds": ((self.finished_at or now) - self.started_at) if self.started_at else 0.0,
+        }
+
+
+class JobQueue:
+    """Bounded background executor for formatting jobs.
+
+    At most `max_workers` jobs run at once and at most `max_queued` wait behind them;
+    submit() raises QueueFull beyond that. Each job gets its own workspace directory
+    (soffice scratch files), removed when the job finishes. Identical requests that are
+    still in flight share one job. Finished jobs are kept for `retention` seconds so
+    sessions can poll for their results. Rendering goes through StagedPipeline, so with a
+    `body_cache` a header/footer-only edit skips the body stages.
+
+    Uploads are preflighted before they are queued: submit() raises PreflightRejected for
+    packages that are malformed or over the limits, and large manuscripts run in a separate
+    heavy lane (`heavy_workers` running, `heavy_queued` waiting) so they cannot hold up the
+    ordinary ones.
+    """
+
+    def __init__(self, max_workers=None, max_queued=None, workspace_root=None, cache=None, body_cache=None,
+                 retention=900, heavy_workers=None, heavy_queued=None):
+        self.max_workers = max_workers or int(os.environ.get("JOB_WORKERS", "2"))
+        self.max_queued = max_queued if max_queued is not None else int(os.environ.get("JOB_QUEUE_LIMIT", str(self.max_workers * 4)))
+        self.heavy_workers = heavy_workers or int(os.environ.get("JOB_HEAVY_WORKERS", "1"))
+        self.heavy_queued = heavy_queued if heavy_queued is not None else int(os.environ.get("JOB_HEAVY_QUEUE_LIMIT", str(self.heavy_workers * 2)))
+        self.workspace_root = workspace_root or DEFAULT_WORKSPACE_DIR
+        self.cache = cache
+        self.pipeline = StagedPipeline(cache=cache, body_cache=body_cache)
+        self.retention = retention
+        self.rejected = 0
+        self.preflight_rejected = 0
+        self._jobs = {}
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self._executors = {
+            FAST: ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="formatjob"),
+            HEAVY: ThreadPoolExecutor(max_workers=self.heavy_workers, thread_name_prefix="formatjob-heavy"),
+        }
+        os.makedirs(self.workspace_root, exist_ok=True)
+
+    # ---------- submission ----------
+    def submit(self, docx_bytes, logo_bytes, params):
+        key = cache_key(docx_bytes, logo_bytes, params, PIPELINE_VERSION)
+        # Cached results are answered on the spot and never take a queue slot
+        cached = self.cache.get(key) if self.cache is not None else None
+        if cached is not None:
+            job = Job(uuid.uuid4().hex, key, None)
+            job.docx, job.pdf = cached
+            job.cache_hit = True
+            job.status = DONE
+            job.progress = 1.0
+            job.started_at = job.finished_at = time.time()
+            job._done.set()
+            with self._lock:
+                self._prune()
+                self._jobs[job.id] = job
+            return job
+
+        # Cheap package inspection before anything parses the upload
+        check = preflight(docx_bytes)
+        if check["lane"] is None:
+            with self._lock:
+                self.preflight_rejected += 1
+            raise PreflightRejected(check)
+        lane = check["lane"]
+
+        with self._lock:
+            self._prune()
+            job = self._in_flight.get(key)
+            if job is not None:
+                return job
+            active = sum(1 for j in self._jobs.values() if not j.done and j.lane == lane)
+            limit = self.max_workers + self.max_queued if lane == FAST else self.heavy_workers + self.heavy_queued
+            if active >= limit:
+                self.rejected += 1
+                raise QueueFull(f"{active} {lane} jobs already running or queued")
+
+            job_id = uuid.uuid4().hex
+            job = Job(job_id, key, tempfile.mkdtemp(prefix=f"job_{job_id[:8]}_", dir=self.workspace_root), lane=lane)
+            job.preflight = check
+            self._jobs[job_id] = job
+            self._in_flight[key] = job
+        self._executors[lane].submit(self._run, job, docx_bytes, logo_bytes, params)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def position(self, job):
+        # Number of queued jobs ahead of this one in its lane (0 once it is running)
+        if job.status != QUEUED:
+            return 0
+        with self._lock:
+            return sum(1 for j in self._jobs.values()
+                       if j.status == QUEUED and j.lane == job.lane and j.submitted_at < job.submitted_at)
+
+    # ---------- worker ----------
+    def _run(self, job, docx_bytes, logo_bytes, params):
+        job.status = RUNNING
+        job.started_at = time.time()
+        recorder = RunRecorder(hooks=[job._on_event], name=job.id)
+        try:
+            # submit() already missed the finished-result cache
+            job.docx, job.pdf, job.stages = self.pipeline.render(docx_bytes, logo_bytes, params, recorder=recorder,
+                                                                 workdir=job.workspace, lookup=False)
+            job.report = recorder.report()
+            job.progress = 1.0
+            job.status = DONE
+        except Exception as e:
+            job.error = f"{type(e).__name__}: {e}"
+            job.report = {"traceback": traceback.format_exc()}
+            job.status = FAILED
+            print(f"✖ Job {job.id} failed:", job.error)
+        finally:
+            job.finished_at = time.time()
+            shutil.rmtree(job.workspace, ignore_errors=True)
+            with self._lock:
+                if self._in_flight.get(job.key) is job:
+                    del self._in_flight[job.key]
+            job._done.set()
+
+    def _prune(self):
+        cutoff = time.time() - self.retention
+        for job_id in [i for i, j in self._jobs.items() if j.done and j.finished_at < cutoff]:
+            del self._jobs[job_id]
+
+    # ---------- status ----------
+    def stats(self):
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return {
+            "queued": sum(1 for j in jobs if j.status == QUEUED),
+            "running": sum(1 for j in jobs if j.status == RUNNING),
+            "done": sum(1 for j in jobs if j.status == DONE),
+            "failed": sum(1 for j in jobs if j.status == FAILED),
+            "rejected": self.rejected,
+            "preflight_rejected": self.preflight_rejected,
+            "heavy_running": sum(1 for j in jobs if j.status == RUNNING and j.lane == HEAVY),
+            "heavy_queued": sum(1 for j in jobs if j.status == QUEUED and j.lane == HEAVY),
+            "max_workers": self.max_workers,
+            "max_queued": self.max_queued,
+            "heavy_workers": self.heavy_workers,
+            "heavy_queued_limit": self.heavy_queued,
+        }
+
+    def shutdown(self, wait=True):
+        for executor in self._executors.values():
+            executor.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,371 @@
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import os
+import platform
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from benchmark import peak_rss_bytes
+from instrumentation import RunRecorder
+from syntheticDocs import SIZE_MATRIX, make_logo, manuscript_bytes
+
+
+# Corpus mix: case name -> share of requests
+DEFAULT_MIX = {"small": 0.6, "medium": 0.3, "large": 0.1}
+
+# Limits a run must stay within; metric -> maximum
+DEFAULT_SLO = {"p95": 10.0, "error_rate": 0.01}
+
+HEADER = {
+    "line1": "ISSN (Online): 0000-0000",
+    "line2": "Load Test Journal",
+    "doi_url": "https://doi.org/10.0000/load",
+    "footer_journal": "LOAD",
+}
+
+
+# -----------------------------------------------
+def build_corpus(mix, variants=3, seed=0):
+    """Synthetic manuscripts per case; several seeds each so requests do not all share one input."""
+    corpus = {}
+    for case in mix:
+        corpus[case] = [manuscript_bytes(**dict(SIZE_MATRIX[case], seed=seed + i)) for i in range(variants)]
+    return corpus
+
+
+def request_plan(mix, count, variants=3):
+    # Deterministic interleaving that matches the mix over `count` requests
+    plan = []
+    credit = dict.fromkeys(mix, 0.0)
+    for i in range(count):
+        for case, share in mix.items():
+            credit[case] += share
+        case = max(credit, key=credit.get)
+        credit[case] -= 1.0
+        plan.append({"id": i, "case": case, "variant": i % variants})
+    return plan
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * q
+    low = int(k)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (k - low)
+
+
+def current_rss_bytes():
+    # Linux only; None elsewhere
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        return None
+    return None
+
+
+class RssSampler(threading.Thread):
+    """Samples this process's RSS every `interval` seconds to show memory growth over the run."""
+
+    def __init__(self, interval=0.5):
+        super().__init__(name="rss-sampler", daemon=True)
+        self.interval = interval
+        self.samples = []
+        self._halt = threading.Event()
+
+    def run(self):
+        while not self._halt.is_set():
+            rss = current_rss_bytes()
+            if rss is not None:
+                self.samples.append(rss)
+            self._halt.wait(self.interval)
+
+    def stop(self):
+        self._halt.set()
+        self.join()
+        return {
+            "start": self.samples[0] if self.samples else None,
+            "end": self.samples[-1] if self.samples else None,
+            "max": max(self.samples) if self.samples else None,
+        }
+
+
+# ---------- drivers ----------
+def _direct_request(input_path, logo_path, workdir, request_id, pdf, pdf_profile):
+    """process_document in a worker process; returns (stage_totals, error)."""
+    from bodyParser import process_document
+
+    recorder = RunRecorder(name=str(request_id))
+    output_path = os.path.join(workdir, f"out_{request_id}.docx")
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            process_document(input_path, logo_path, output_path, line3=f"Request {request_id}",
+                             recorder=recorder, convert_pdf=pdf, pdf_profile=pdf_profile, **HEADER)
+        return recorder.stage_totals(), None
+    except Exception as e:
+        return recorder.stage_totals(), f"{type(e).__name__}: {e}"
+    finally:
+        for path in (output_path, os.path.splitext(output_path)[0] + ".pdf"):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+class DirectDriver:
+    """Drives bodyParser.process_document on a process pool, one worker per concurrent client."""
+
+    def __init__(self, corpus, concurrency, workdir, pdf=False, pdf_profile="default"):
+        self.workdir = workdir
+        self.pdf = pdf
+        self.pdf_profile = pdf_profile
+        self.logo_path = os.path.join(workdir, "logo.png")
+        with open(self.logo_path, "wb") as f:
+            f.write(make_logo())
+        self.paths = {}
+        for case, variants in corpus.items():
+            for i, data in enumerate(variants):
+                path = os.path.join(workdir, f"{case}_{i}.docx")
+                with open(path, "wb") as f:
+                    f.write(data)
+                self.paths[case, i] = path
+        self.executor = ProcessPoolExecutor(max_workers=concurrency)
+
+    def run(self, request):
+        stages, error = self.executor.submit(
+            _direct_request, self.paths[request["case"], request["variant"]], self.logo_path, self.workdir,
+            request["id"], self.pdf, self.pdf_profile).result()
+        return {"status": "ok" if error is None else "failed", "error": error, "stages": stages}
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        return {"peak_rss_bytes": peak_rss_bytes(children=True)}
+
+
+class SessionDriver:
+    """Stand-in for an app.py session: submit to the shared JobQueue and poll it like the page does.
+
+    A QueueFull is what the app shows as "the formatter is busy" and a PreflightRejected is an upload
+    it refuses; both are reported as "rejected".
+    """
+
+    def __init__(self, corpus, concurrency, workdir, pdf=False, pdf_profile="default", workers=None,
+                 queue_limit=None, cache=False, poll=0.3):
+        from jobQueue import JobQueue
+        from resultCache import ResultCache
+
+        self.corpus = corpus
+        self.pdf = pdf
+        self.pdf_profile = pdf_profile
+        self.poll = poll
+        self.logo = make_logo()
+        result_cache = ResultCache(root=os.path.join(workdir, "cache")) if cache else None
+        # Both caches live under workdir, so a run neither reads nor pollutes the application's caches
+        body_cache = ResultCache(root=os.path.join(workdir, "body_cache")) if cache else None
+        self.queue = JobQueue(max_workers=workers or concurrency, max_queued=queue_limit,
+                              workspace_root=os.path.join(workdir, "jobs"), cache=result_cache, body_cache=body_cache)
+        if not pdf:
+            # The queue always renders PDFs; without --pdf the pipeline skips that stage
+            render = self.queue.pipeline.render
+            self.queue.pipeline.render = lambda *a, **k: render(*a, **dict(k, convert_pdf=False))
+
+    def run(self, request):
+        from jobQueue import FAILED, QueueFull
+        from preflight import PreflightRejected
+
+        params = dict(HEADER, line3=f"Request {request['id']}", pdf_profile=self.pdf_profile)
+        try:
+            job = self.queue.submit(self.corpus[request["case"]][request["variant"]], self.logo, params)
+        except (QueueFull, PreflightRejected) as e:
+            return {"status": "rejected", "error": str(e), "stages": {}}
+        while not job.wait(timeout=self.poll):
+            self.queue.position(job)
+        if job.status == FAILED:
+            return {"status": "failed", "error": job.error, "stages": {}}
+        stages = job.report["stages"] if job.report and "stages" in job.report else {}
+        return {"status": "ok", "error": None, "stages": stages, "cache_hit": job.cache_hit, "lane": job.lane}
+
+    def close(self):
+        self.queue.shutdown(wait=True)
+        return {"peak_rss_bytes": peak_rss_bytes(), "queue": self.queue.stats()}
+
+
+# -----------------------------------------------
+def run_load(driver, plan, concurrency, think_time=0.0):
+    """Closed loop: `concurrency` clients each take the next request as soon as their last one finishes.
+
+    The driver is closed before the CPU times are read, so worker processes it reaps count too.
+    """
+    results = [None] * len(plan)
+    counter = itertools.count()
+
+    def client():
+        while True:
+            i = next(counter)
+            if i >= len(plan):
+                return
+            started = time.perf_counter()
+            try:
+                outcome = driver.run(plan[i])
+            except Exception as e:
+                outcome = {"status": "failed", "error": f"{type(e).__name__}: {e}", "stages": {}}
+            outcome.update(plan[i], latency=time.perf_counter() - started)
+            results[i] = outcome
+            if think_time:
+                time.sleep(think_time)
+
+    sampler = RssSampler()
+    sampler.start()
+    cpu_before = os.times()
+    started = time.perf_counter()
+    clients = [threading.Thread(target=client, name=f"load-client-{n}") for n in range(concurrency)]
+    for t in clients:
+        t.start()
+    try:
+        for t in clients:
+            t.join()
+        wall = time.perf_counter() - started
+    finally:
+        closing = driver.close()
+    cpu_after = os.times()
+    rss = sampler.stop()
+
+    cpu = sum(cpu_after[:4]) - sum(cpu_before[:4])  # user + system, this process and reaped children
+    report = summarize(results, wall, cpu, rss)
+    report.update(closing)
+    return report
+
+
+def summarize(results, wall, cpu_seconds, rss):
+    ok = [r for r in results if r["status"] == "ok"]
+    latencies = [r["latency"] for r in ok]
+    failed = sum(1 for r in results if r["status"] == "failed")
+    rejected = sum(1 for r in results if r["status"] == "rejected")
+    stage_names = sorted({name for r in ok for name in r["stages"]})
+    stages = {}
+    for name in stage_names:
+        values = [r["stages"][name] for r in ok if name in r["stages"]]
+        stages[name] = {"p50": percentile(values, 0.5), "p95": percentile(values, 0.95)}
+    by_case = {}
+    for case in sorted({r["case"] for r in results}):
+        values = [r["latency"] for r in ok if r["case"] == case]
+        by_case[case] = {"requests": sum(1 for r in results if r["case"] == case),
+                         "p50": percentile(values, 0.5), "p95": percentile(values, 0.95)}
+    return {
+        "requests": len(results),
+        "ok": len(ok),
+        "failed": failed,
+        "rejected": rejected,
+        "error_rate": (failed + rejected) / len(results) if results else 0.0,
+        "wall_seconds": wall,
+        "throughput_per_minute": len(ok) / wall * 60 if wall else 0.0,
+        "p50": percentile(latencies, 0.50),
+        "p95": percentile(latencies, 0.95),
+        "p99": percentile(latencies, 0.99),
+        "mean": statistics.fmean(latencies) if latencies else None,
+        "max": max(latencies) if latencies else None,
+        "cpu_seconds": cpu_seconds,
+        "cpu_utilization": cpu_seconds / (wall * (os.cpu_count() or 1)) if wall else 0.0,
+        "rss": rss,
+        "stages": stages,
+        "by_case": by_case,
+        "errors": sorted({r["error"] for r in results if r["error"]})[:10],
+    }
+
+
+def check_slo(report, slo):
+    """Violations of `slo` (metric -> maximum); a metric with no value (e.g. no successful request) fails."""
+    violations = []
+    for metric, limit in slo.items():
+        value = report.get(metric)
+        if value is None or value > limit:
+            violations.append({"metric": metric, "limit": limit, "value": value})
+    return violations
+
+
+def parse_slo(items):
+    slo = {}
+    for item in items:
+        metric, _, limit = item.partition("=")
+        if not limit:
+            raise argparse.ArgumentTypeError(f"SLO must look like metric=limit, got {item!r}")
+        slo[metric.strip()] = float(limit)
+    return slo
+
+
+# ------------------- CLI -------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Drive concurrent formatting requests and check latency SLOs.")
+    parser.add_argument("--mode", choices=["direct", "app"], default="app",
+                        help="direct: process_document on a process pool; app: app.py sessions on the JobQueue")
+    parser.add_argument("--concurrency", type=int, default=4, help="concurrent clients")
+    parser.add_argument("--requests", type=int, default=40)
+    parser.add_argument("--mix", default=None,
+                        help=f"case=share list, e.g. small=0.7,large=0.3 (cases: {', '.join(SIZE_MATRIX)})")
+    parser.add_argument("--variants", type=int, default=3, help="distinct manuscripts per case")
+    parser.add_argument("--workers", type=int, default=None, help="app mode: JobQueue workers (default: concurrency)")
+    parser.add_argument("--queue-limit", type=int, default=None, help="app mode: JobQueue waiting-line limit")
+    parser.add_argument("--cache", action="store_true", help="app mode: enable the result and body caches")
+    parser.add_argument("--think-time", type=float, default=0.0, help="seconds a client waits between requests")
+    parser.add_argument("--pdf", action="store_true", help="include soffice PDF conversion")
+    parser.add_argument("--pdf-profile", default="default")
+    parser.add_argument("--slo", nargs="*", default=None, metavar="METRIC=MAX",
+                        help="e.g. p95=5 p99=12 error_rate=0.01 (default: " +
+                             " ".join(f"{k}={v}" for k, v in DEFAULT_SLO.items()) + ")")
+    parser.add_argument("--output", default="load_results.json")
+    args = parser.parse_args(argv)
+
+    mix = DEFAULT_MIX
+    if args.mix:
+        mix = {case: float(share) for case, share in (item.split("=") for item in args.mix.split(","))}
+    slo = parse_slo(args.slo) if args.slo is not None else DEFAULT_SLO
+
+    corpus = build_corpus(mix, variants=args.variants)
+    plan = request_plan(mix, args.requests, variants=args.variants)
+    workdir = tempfile.mkdtemp(prefix="loadtest_")
+    try:
+        if args.mode == "direct":
+            driver = DirectDriver(corpus, args.concurrency, workdir, pdf=args.pdf, pdf_profile=args.pdf_profile)
+        else:
+            driver = SessionDriver(corpus, args.concurrency, workdir, pdf=args.pdf, pdf_profile=args.pdf_profile,
+                                   workers=args.workers, queue_limit=args.queue_limit, cache=args.cache)
+        with contextlib.redirect_stdout(io.StringIO()) if args.mode == "app" else contextlib.nullcontext():
+            report = run_load(driver, plan, args.concurrency, think_time=args.think_time)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report.update(mode=args.mode, concurrency=args.concurrency, mix=mix, pdf=args.pdf,
+                  created=time.strftime("%Y-%m-%dT%H:%M:%S"), python=platform.python_version(), cpus=os.cpu_count())
+    report["slo"] = slo
+    report["slo_violations"] = check_slo(report, slo)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    rss = report.get("peak_rss_bytes")
+    print(f"✔ {report['ok']}/{report['requests']} ok, {report['failed']} failed, {report['rejected']} rejected "
+          f"in {report['wall_seconds']:.1f}s ({report['throughput_per_minute']:.1f}/min, "
+          f"CPU {report['cpu_utilization'] * 100:.0f}%)")
+    if report["p50"] is not None:
+        print(f"✔ latency p50 {report['p50']:.2f}s  p95 {report['p95']:.2f}s  p99 {report['p99']:.2f}s  "
+              f"max {report['max']:.2f}s" + (f"  peak RSS {rss / 2**20:.0f} MiB" if rss else ""))
+    print(f"✔ Results written to: {args.output}")
+    for v in report["slo_violations"]:
+        value = "n/a" if v["value"] is None else f"{v['value']:.4g}"
+        print(f"✖ SLO {v['metric']}: {value} > {v['limit']:.4g}")
+    if report["slo_violations"]:
+        return 1
+    print("✔ SLO met")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,148 @@
+import io
+import os
+import struct
+import zipfile
+import zlib
+
+from docx.opc.packuri import CONTENT_TYPES_URI, PACKAGE_URI
+from docx.opc.part import XmlPart
+from docx.opc.pkgwriter import _ContentTypesItem
+
+import instrumentation
+
+
+# Fixed part of a zip local file header; it ends with the name and extra-field lengths
+_LOCAL_HEADER = struct.Struct(zipfile.structFileHeader)
+_COPY_CHUNK = 1024 * 1024
+
+
+# -----------------------------------------------
+def remember_source(doc, source):
+    """Keep a handle on the zip a Document was loaded from so save_document can copy from it.
+
+    Paths, bytes and seekable streams are kept by reference, never copied; save_document
+    drops the handle once it has saved.
+    """
+    if not isinstance(source, (bytes, bytearray, str, os.PathLike)):
+        readable = hasattr(source, "read") and hasattr(source, "seek")
+        if not readable or (hasattr(source, "seekable") and not source.seekable()):
+            source = None
+    doc.part.package._source_zip = source
+    return doc
+
+
+def source_of(doc):
+    return getattr(doc.part.package, "_source_zip", None)
+
+
+def forget_source(doc):
+    doc.part.package._source_zip = None
+
+
+def _open_source(source):
+    if isinstance(source, (bytes, bytearray)):
+        return zipfile.ZipFile(io.BytesIO(source))
+    return zipfile.ZipFile(source)
+
+
+def _same_file(source, output):
+    if not isinstance(output, (str, os.PathLike)) or not isinstance(source, (str, os.PathLike)):
+        return False
+    return os.path.exists(output) and os.path.samefile(source, output)
+
+
+def _unchanged(info, blob):
+    return info is not None and info.file_size == len(blob) and info.CRC == zlib.crc32(blob)
+
+
+# zipfile has no public way to add an already-compressed entry; copy_raw_entry keeps the
+# central directory itself through these ZipFile internals (pinned by tests/test_packageWriter.py)
+_ZIPFILE_INTERNALS = ("fp", "filelist", "NameToInfo", "start_dir", "_didModify")
+
+
+def supports_raw_copy(out):
+    """Whether this Python's ZipFile still has the internals copy_raw_entry relies on."""
+    return all(hasattr(out, name) for name in _ZIPFILE_INTERNALS) and hasattr(zipfile.ZipInfo, "FileHeader")
+
+
+def copy_raw_entry(src, info, out):
+    """Append `info` from zip `src` to zip `out` as its still-compressed bytes (no inflate/deflate).
+
+    Only call it when supports_raw_copy(out) holds.
+    """
+    src.fp.seek(info.header_offset)
+    fields = _LOCAL_HEADER.unpack(src.fp.read(_LOCAL_HEADER.size))
+    src.fp.seek(info.header_offset + _LOCAL_HEADER.size + fields[-2] + fields[-1])
+
+    entry = zipfile.ZipInfo(info.filename, info.date_time)
+    entry.compress_type = info.compress_type
+    entry.CRC = info.CRC
+    entry.compress_size = info.compress_size
+    entry.file_size = info.file_size
+    entry.external_attr = info.external_attr
+    # Sizes and CRC go in the local header, so no trailing data descriptor
+    entry.flag_bits = info.flag_bits & ~0x08
+    entry.header_offset = out.fp.tell()
+    out.fp.write(entry.FileHeader())
+    remaining = info.compress_size
+    while remaining:
+        chunk = src.fp.read(min(_COPY_CHUNK, remaining))
+        out.fp.write(chunk)
+        remaining -= len(chunk)
+    out.filelist.append(entry)
+    out.NameToInfo[entry.filename] = entry
+    out.start_dir = out.fp.tell()
+    out._didModify = True
+
+
+def save_document(doc, output, source=None, keep_source=False):
+    """Save `doc` like Document.save, copying unchanged binary parts straight from the source zip.
+
+    XML parts are always re-serialized. Media, embedded objects, fonts and any other part python-docx
+    keeps as a plain blob are copied as raw compressed entries when the source zip holds the same
+    bytes (size and CRC-32) under the same name. Without a source it is Document.save, and without
+    the zipfile internals the raw copy needs (see supports_raw_copy) every part goes through writestr.
+    The remembered source is released afterwards unless `keep_source` is set for a later save.
+    Returns a report of the parts copied and written.
+    """
+    if source is None:
+        source = source_of(doc)
+        if not keep_source:
+            forget_source(doc)
+    report = {"copied": 0, "written": 0, "bytes_copied": 0}
+    if isinstance(source, (str, os.PathLike)) and not os.path.exists(source):
+        source = None  # e.g. a temporary upload removed since loading
+    elif getattr(source, "closed", False):
+        source = None
+    if source is None or _same_file(source, output):
+        doc.save(output)
+        return report
+
+    package = doc.part.package
+    parts = package.parts
+    for part in parts:
+        part.before_marshal()
+
+    with _open_source(source) as src, zipfile.ZipFile(output, "w", compression=zipfile.ZIP_DEFLATED) as out:
+        raw_copy = supports_raw_copy(out)
+        if not raw_copy:
+            print("✖ zipfile internals changed; media parts are recompressed instead of copied")
+        entries = {info.filename: info for info in src.infolist() if not info.flag_bits & 0x01}
+        # Same member order as docx.opc.pkgwriter.PackageWriter
+        out.writestr(CONTENT_TYPES_URI.membername, _ContentTypesItem.from_parts(parts).blob)
+        out.writestr(PACKAGE_URI.rels_uri.membername, package.rels.xml)
+        for part in parts:
+            name = part.partname.membername
+            if raw_copy and not isinstance(part, XmlPart) and _unchanged(entries.get(name), part.blob):
+                copy_raw_entry(src, entries[name], out)
+                report["copied"] += 1
+                report["bytes_copied"] += entries[name].compress_size
+            else:
+                out.writestr(name, part.blob)
+                report["written"] += 1
+            if len(part.rels):
+                out.writestr(part.partname.rels_uri.membername, part.rels.xml)
+
+    instrumentation.count("parts_copied_raw", report["copied"])
+    instrumentation.count("bytes_copied_raw", report["bytes_copied"])
+    return report
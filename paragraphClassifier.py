@@ -0,0 +1,133 @@
+import numpy as np
+
+from docx.enum.text import WD_PARAGRAPH_ALIGNMENT
+from docx.oxml.ns import qn
+
+
+R_TAG = qn("w:r")
+B_TAG = qn("w:b")
+SZ_TAG = qn("w:sz")
+W_VAL = qn("w:val")
+
+CENTER = int(WD_PARAGRAPH_ALIGNMENT.CENTER)
+NO_ALIGNMENT = -1
+
+# Codes used by the label arrays
+REGIONS = ("front", "abstract", "references")
+MARKERS = (None, "abstract", "references")
+TAGS = (None, "heading", "subheading")
+
+
+# -----------------------------------------------
+# Classification rules. The default profile is the original heuristics of bodyIndex:
+# is_heading_text, the 1-10 word heading candidates and the abstract/references state machine.
+DEFAULT_PROFILE = {
+    "heading_max_words": 6,         # upper-case paragraphs up to this many words are headings
+    "candidate_words": (1, 10),     # word range of heading/subheading candidates
+    "abstract_markers": ("ABSTRACT",),
+    "references_markers": ("REFERENCES",),
+    "min_bold_ratio": None,         # candidates need at least this share of bold characters
+    "min_font_size": None,          # ... and at least this font size in points
+}
+
+# Per-journal overrides of DEFAULT_PROFILE, keyed by journalCode
+JOURNAL_PROFILES = {
+    "EPRA": {"references_markers": ("REFERENCES", "BIBLIOGRAPHY", "WORKS CITED")},
+}
+
+
+def journal_profile(journalCode=None, **overrides):
+    profile = dict(DEFAULT_PROFILE)
+    profile.update(JOURNAL_PROFILES.get(journalCode, {}))
+    profile.update(overrides)
+    return profile
+
+
+def needs_run_features(profile):
+    return profile.get("min_bold_ratio") is not None or profile.get("min_font_size") is not None
+
+
+# -----------------------------------------------
+def _is_bold(rPr):
+    b = rPr.find(B_TAG)
+    return b is not None and b.get(W_VAL, "true").lower() not in ("0", "false", "off")
+
+
+def _run_features(element):
+    # (share of characters in directly bolded runs, largest direct font size in points)
+    chars = bold = 0
+    size = np.nan
+    for r in element.iterchildren(R_TAG):
+        n = sum(len(t.text or "") for t in r.iterchildren(qn("w:t")))
+        chars += n
+        rPr = r.rPr
+        if rPr is None:
+            continue
+        if _is_bold(rPr):
+            bold += n
+        sz = rPr.find(SZ_TAG)
+        if sz is not None and sz.get(W_VAL, "").isdigit():
+            size = np.fmax(size, int(sz.get(W_VAL)) / 2)
+    return (bold / chars if chars else 0.0), size
+
+
+class FeatureTable:
+    """Column arrays describing a list of BodyIndex paragraph entries, built in one pass.
+
+    Run-level columns (bold_ratio, font_size) read the XML and are only filled when
+    `run_features` is set; otherwise they hold NaN.
+    """
+
+    def __init__(self, entries, run_features=False):
+        n = len(entries)
+        self.size = n
+        self.word_count = np.fromiter((e.word_count for e in entries), dtype=np.int32, count=n)
+        self.length = np.fromiter((len(e.stripped) for e in entries), dtype=np.int32, count=n)
+        self.is_upper = np.fromiter((e.stripped.isupper() for e in entries), dtype=bool, count=n)
+        self.alignment = np.fromiter(
+            (NO_ALIGNMENT if e.alignment is None else int(e.alignment) for e in entries), dtype=np.int8, count=n)
+        self.has_runs = np.fromiter((e.has_runs for e in entries), dtype=bool, count=n)
+        self.upper = np.array([e.upper for e in entries], dtype=object)
+        self.bold_ratio = np.full(n, np.nan, dtype=np.float32)
+        self.font_size = np.full(n, np.nan, dtype=np.float32)
+        if run_features:
+            for i, e in enumerate(entries):
+                self.bold_ratio[i], self.font_size[i] = _run_features(e.element)
+
+def _seen_before(flags):
+    # True where any earlier element of `flags` is set
+    before = np.zeros(flags.shape, dtype=bool)
+    if flags.size:
+        before[1:] = np.logical_or.accumulate(flags)[:-1]
+    return before
+
+
+# -----------------------------------------------
+def classify_regions(features, profile=DEFAULT_PROFILE):
+    """(heading, marker, region) arrays; marker and region index MARKERS and REGIONS.
+
+    `region` is the state a paragraph is styled under and `marker` flags the lines that
+    switch it, as the loop in process_body_content_with_styles reads them.
+    """
+    heading = features.is_upper & (features.word_count <= profile["heading_max_words"]) & (features.length > 0)
+
+    abstract = np.isin(features.upper, list(profile["abstract_markers"]))
+    after_abstract = _seen_before(abstract)
+    references = (np.isin(features.upper, list(profile["references_markers"]))
+                  & ~abstract & ~heading & ~after_abstract)
+    after_references = _seen_before(references)
+
+    marker = np.where(abstract, 1, np.where(references, 2, 0)).astype(np.int8)
+    region = np.where(after_abstract, 1, np.where(after_references, 2, 0)).astype(np.int8)
+    return heading, marker, region
+
+
+def classify_candidates(features, profile=DEFAULT_PROFILE):
+    """Heading candidate tag codes (index TAGS): centred candidates are headings, the rest subheadings."""
+    low, high = profile["candidate_words"]
+    candidate = (features.length > 0) & features.has_runs & (features.word_count >= low) & (features.word_count <= high)
+    if profile.get("min_bold_ratio") is not None:
+        candidate &= features.bold_ratio >= profile["min_bold_ratio"]
+    if profile.get("min_font_size") is not None:
+        candidate &= features.font_size >= profile["min_font_size"]
+    return np.where(candidate, np.where(features.alignment == CENTER, 1, 2), 0).astype(np.int8)
@@ -0,0 +1,103 @@
+import json
+import os
+import shutil
+import subprocess
+
+
+QPDF_BIN = os.environ.get("QPDF_BIN", "qpdf")
+QPDF_OK = (0, 3)  # success, success with warnings
+
+# Named presets for LibreOffice's writer_pdf_Export filter. "filter" is passed through as its
+# FilterData; "linearize" rewrites the finished PDF for fast web view (LibreOffice cannot).
+PDF_PROFILES = {
+    "default": {
+        "description": "LibreOffice defaults",
+        "filter": {},
+    },
+    "web": {
+        "description": "Smallest file: images at 150 DPI, JPEG quality 75, linearized",
+        "filter": {
+            "ReduceImageResolution": True,
+            "MaxImageResolution": 150,
+            "UseLosslessCompression": False,
+            "Quality": 75,
+            "ExportBookmarks": True,
+        },
+        "linearize": True,
+    },
+    "print": {
+        "description": "Full-resolution images, lossless compression, fonts embedded",
+        "filter": {
+            "ReduceImageResolution": False,
+            "UseLosslessCompression": True,
+            "EmbedStandardFonts": True,
+            "ExportBookmarks": True,
+        },
+    },
+    "archive": {
+        "description": "PDF/A-2b, tagged, fonts embedded",
+        "filter": {
+            "SelectPdfVersion": 2,
+            "UseTaggedPDF": True,
+            "EmbedStandardFonts": True,
+            "ReduceImageResolution": False,
+        },
+    },
+}
+
+
+def pdf_profile(name):
+    try:
+        return PDF_PROFILES[name or "default"]
+    except KeyError:
+        raise ValueError(f"Unknown PDF profile: {name!r}") from None
+
+
+def filter_data(name):
+    return dict(pdf_profile(name)["filter"])
+
+
+def cli_filter(name):
+    """--convert-to argument for `name`: plain "pdf", or pdf with the filter options as JSON (LibreOffice 7.4+)."""
+    options = filter_data(name)
+    if not options:
+        return "pdf"
+    typed = {}
+    for key, value in options.items():
+        if isinstance(value, bool):
+            typed[key] = {"type": "boolean", "value": "true" if value else "false"}
+        elif isinstance(value, int):
+            typed[key] = {"type": "long", "value": str(value)}
+        else:
+            typed[key] = {"type": "string", "value": str(value)}
+    return "pdf:writer_pdf_Export:" + json.dumps(typed, separators=(",", ":"))
+
+
+# -----------------------------------------------
+def linearize_pdf(pdf_path, qpdf_bin=None):
+    """Linearize `pdf_path` in place with qpdf; returns False (file untouched) when qpdf is unavailable or fails."""
+    qpdf_bin = qpdf_bin or QPDF_BIN
+    if shutil.which(qpdf_bin) is None:
+        print("✖ qpdf not found; PDF left unlinearized")
+        return False
+    linearized = pdf_path + ".linear"
+    try:
+        result = subprocess.run([qpdf_bin, "--linearize", pdf_path, linearized],
+                                stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        # qpdf exits with 3 when it succeeded but had warnings about the input
+        if result.returncode not in QPDF_OK:
+            raise subprocess.CalledProcessError(result.returncode, result.args, stderr=result.stderr)
+        os.replace(linearized, pdf_path)
+        return True
+    except (subprocess.CalledProcessError, OSError) as e:
+        print("✖ PDF linearization failed:", e)
+        if os.path.exists(linearized):
+            os.remove(linearized)
+        return False
+
+
+def finish_pdf(pdf_path, name):
+    # Post-processing a profile asks for after LibreOffice has written the file
+    if pdf_path and pdf_profile(name).get("linearize"):
+        return linearize_pdf(pdf_path)
+    return False
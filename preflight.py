@@ -0,0 +1,234 @@
+import argparse
+import io
+import json
+import os
+import re
+import time
+import zipfile
+import zlib
+from collections import Counter
+
+import instrumentation
+
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+DOCUMENT_PART = "word/document.xml"
+
+FAST = "fast"
+HEAVY = "heavy"
+
+# Any limit exceeded sends the job to the heavy lane
+HEAVY_LIMITS = {
+    "package_bytes": 20 * 1024 * 1024,
+    "media_count": 30,
+    "media_bytes": 15 * 1024 * 1024,
+    "paragraphs": 3000,
+    "table_rows": 2000,
+    "sections": 10,
+    "ole_objects": 0,
+}
+
+# Any limit exceeded rejects the job outright
+REJECT_LIMITS = {
+    "package_bytes": 200 * 1024 * 1024,
+    "uncompressed_bytes": 1024 * 1024 * 1024,
+    "document_xml_bytes": 200 * 1024 * 1024,
+    "media_count": 500,
+    "paragraphs": 100000,
+    "table_rows": 100000,
+    "sections": 500,
+    "ole_objects": 50,
+}
+
+# Deflate tops out around 1000:1; ratios beyond this on a sizeable entry mean a zip bomb
+MAX_COMPRESSION_RATIO = 200
+_RATIO_MIN_BYTES = 10 * 1024 * 1024
+
+LABELS = {
+    "package_bytes": "file size",
+    "uncompressed_bytes": "unpacked size",
+    "document_xml_bytes": "document.xml size",
+    "media_count": "embedded images",
+    "media_bytes": "image data",
+    "paragraphs": "paragraphs",
+    "table_rows": "table rows",
+    "sections": "sections",
+    "ole_objects": "embedded OLE objects",
+}
+
+_SCAN_CHUNK = 1024 * 1024
+_TAIL_BYTES = 64  # longer than any counted start tag
+
+
+class PreflightRejected(ValueError):
+    """The upload failed preflight; `report` holds the reason and the package statistics."""
+
+    def __init__(self, report):
+        super().__init__(report["reason"])
+        self.report = report
+
+
+# -----------------------------------------------
+def _open_zip(source):
+    if isinstance(source, (bytes, bytearray)):
+        return zipfile.ZipFile(io.BytesIO(source)), len(source)
+    if hasattr(source, "getvalue"):
+        data = source.getvalue()
+        return zipfile.ZipFile(io.BytesIO(data)), len(data)
+    if hasattr(source, "read"):
+        # Any other seekable stream, e.g. open(path, "rb")
+        source.seek(0, os.SEEK_END)
+        size = source.tell()
+        source.seek(0)
+        return zipfile.ZipFile(source), size
+    return zipfile.ZipFile(source), os.path.getsize(source)
+
+
+def _fmt(metric, value):
+    if metric.endswith("_bytes"):
+        return f"{value / 2**20:.1f} MB"
+    return str(value)
+
+
+def scan_package(z, package_bytes):
+    """Sizes and part counts from the zip central directory alone; nothing is inflated."""
+    stats = {"package_bytes": package_bytes, "uncompressed_bytes": 0, "document_xml_bytes": None,
+             "media_count": 0, "media_bytes": 0, "embedding_count": 0, "max_compression_ratio": 0.0}
+    for info in z.infolist():
+        stats["uncompressed_bytes"] += info.file_size
+        if info.filename == DOCUMENT_PART:
+            stats["document_xml_bytes"] = info.file_size
+        elif info.filename.startswith("word/media/"):
+            stats["media_count"] += 1
+            stats["media_bytes"] += info.file_size
+        elif info.filename.startswith("word/embeddings/"):
+            stats["embedding_count"] += 1
+        if info.file_size >= _RATIO_MIN_BYTES and info.compress_size:
+            stats["max_compression_ratio"] = max(stats["max_compression_ratio"], info.file_size / info.compress_size)
+    return stats
+
+
+def _tag_pattern(head):
+    # Start tags of the counted elements under whatever prefix the document binds to W_NS
+    match = re.search(rb'xmlns:([\w.-]+)="' + W_NS.encode() + b'"', head)
+    prefix = match.group(1) if match else b"w"
+    return re.compile(b"<" + prefix + rb":(p|tbl|tr|tc|sectPr|object)[ >/]")
+
+
+def scan_body(z, stop_at=None):
+    """Count paragraphs, tables, rows, cells, sections and OLE objects in word/document.xml.
+
+    The part is inflated in chunks and its start tags counted without building a tree; a streamed
+    iterparse costs more than Document() itself on large manuscripts. Body paragraphs are estimated
+    as all paragraphs minus table cells (every cell holds at least one). The scan stops early once a
+    count passes its `stop_at` limit; the job is rejected anyway.
+    """
+    tags = Counter()
+    stop_at = stop_at or {}
+    pattern = None
+    tail = b""
+    with z.open(DOCUMENT_PART) as f:
+        while True:
+            chunk = f.read(_SCAN_CHUNK)
+            if not chunk:
+                break
+            pattern = pattern or _tag_pattern(chunk[:4096])
+            buf = tail + chunk
+            # A tag lying wholly inside the carried tail was counted with the previous chunk
+            tags.update(pattern.findall(buf))
+            tags.subtract(pattern.findall(tail))
+            tail = buf[-_TAIL_BYTES:]
+            counts = _body_counts(tags)
+            if any(counts[key] > limit for key, limit in stop_at.items() if key in counts):
+                counts["truncated"] = True
+                return counts
+    return _body_counts(tags)
+
+
+def _body_counts(tags):
+    return {
+        "paragraphs": max(tags[b"p"] - tags[b"tc"], 0),
+        "tables": tags[b"tbl"],
+        "table_rows": tags[b"tr"],
+        "table_cells": tags[b"tc"],
+        "sections": tags[b"sectPr"],
+        "ole_objects": tags[b"object"],
+    }
+
+
+def route(stats, heavy_limits=None, reject_limits=None):
+    """(lane, reason) for the statistics; lane is None when the job is rejected."""
+    heavy_limits = HEAVY_LIMITS if heavy_limits is None else heavy_limits
+    reject_limits = REJECT_LIMITS if reject_limits is None else reject_limits
+    for metric, limit in reject_limits.items():
+        value = stats.get(metric)
+        if value is not None and value > limit:
+            return None, f"Too large to format: {LABELS[metric]} {_fmt(metric, value)} exceeds the limit of {_fmt(metric, limit)}"
+    over = [metric for metric, limit in heavy_limits.items() if (stats.get(metric) or 0) > limit]
+    if over:
+        return HEAVY, "Heavy: " + ", ".join(f"{LABELS[m]} {_fmt(m, stats[m])}" for m in over)
+    return FAST, "Fast"
+
+
+def preflight(source, heavy_limits=None, reject_limits=None):
+    """Inspect a DOCX (path, bytes or file-like) without parsing it into a Document.
+
+    Returns a report dict: "lane" ("fast", "heavy" or None when rejected), "reason", "stats" and
+    "seconds". Malformed packages are rejected rather than raised.
+    """
+    started = time.perf_counter()
+    reject_limits = REJECT_LIMITS if reject_limits is None else reject_limits
+    stats = {}
+    lane, reason = None, None
+    with instrumentation.span("preflight"):
+        try:
+            z, package_bytes = _open_zip(source)
+        except (zipfile.BadZipFile, OSError) as e:
+            reason = f"Not a DOCX file: {e}"
+        else:
+            with z:
+                stats = scan_package(z, package_bytes)
+                if stats["document_xml_bytes"] is None:
+                    reason = f"Not a Word document: {DOCUMENT_PART} is missing"
+                elif stats["max_compression_ratio"] > MAX_COMPRESSION_RATIO:
+                    reason = f"Suspicious package: an entry expands {stats['max_compression_ratio']:.0f}x when unpacked"
+                else:
+                    lane, reason = route(stats, {}, reject_limits)
+                    if lane is not None:
+                        try:
+                            stats.update(scan_body(z, stop_at=reject_limits))
+                        except (zipfile.BadZipFile, zlib.error) as e:
+                            lane, reason = None, f"Damaged document: {DOCUMENT_PART} cannot be read ({e})"
+                        else:
+                            lane, reason = route(stats, heavy_limits, reject_limits)
+        instrumentation.count(f"preflight_{lane or 'rejected'}")
+    return {"lane": lane, "reason": reason, "stats": stats, "seconds": time.perf_counter() - started}
+
+
+def admit(source, heavy_limits=None, reject_limits=None):
+    """preflight() that raises PreflightRejected instead of returning a rejection."""
+    report = preflight(source, heavy_limits, reject_limits)
+    if report["lane"] is None:
+        raise PreflightRejected(report)
+    return report
+
+
+# ------------------- CLI -------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check DOCX uploads and show the lane each one would take.")
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--json", action="store_true", help="print the full reports as JSON")
+    args = parser.parse_args(argv)
+
+    reports = {path: preflight(path) for path in args.files}
+    if args.json:
+        print(json.dumps(reports, indent=2))
+    else:
+        for path, report in reports.items():
+            mark = "✔" if report["lane"] else "✖"
+            print(f"{mark} {path}: {report['reason']} ({report['seconds'] * 1000:.1f} ms)")
+    return 0 if all(r["lane"] for r in reports.values()) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,141 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+
+
+DEFAULT_CACHE_DIR = os.environ.get("DOC_CACHE_DIR", os.path.join(tempfile.gettempdir(), "docformatter_cache"))
+DEFAULT_MAX_BYTES = int(os.environ.get("DOC_CACHE_MAX_MB", "512")) * 1024 * 1024
+
+DOCX_NAME = "output.docx"
+PDF_NAME = "output.pdf"
+
+
+def cache_key(docx_bytes, logo_bytes, params, pipeline_version):
+    """Content address of one formatting job: input bytes, logo bytes, every parameter and the pipeline version."""
+    h = hashlib.sha256()
+    h.update(f"pipeline:{pipeline_version}\n".encode())
+    h.update(json.dumps(params, sort_keys=True, default=str).encode())
+    # Length prefixes keep the two blobs from being ambiguous when concatenated
+    for blob in (docx_bytes, logo_bytes):
+        h.update(len(blob).to_bytes(8, "big"))
+        h.update(blob)
+    return h.hexdigest()
+
+
+# -----------------------------------------------
+class ResultCache:
+    """On-disk DOCX/PDF result store with size-bounded LRU eviction (recency is the entry's mtime)."""
+
+    def __init__(self, root=None, max_bytes=None):
+        self.root = root or DEFAULT_CACHE_DIR
+        self.max_bytes = max_bytes if max_bytes is not None else DEFAULT_MAX_BYTES
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.root, exist_ok=True)
+
+    def _entry_dir(self, key):
+        return os.path.join(self.root, key)
+
+    def get(self, key):
+        entry = self._entry_dir(key)
+        docx_path = os.path.join(entry, DOCX_NAME)
+        try:
+            with open(docx_path, "rb") as f:
+                docx_bytes = f.read()
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        pdf_bytes = None
+        pdf_path = os.path.join(entry, PDF_NAME)
+        if os.path.exists(pdf_path):
+            with open(pdf_path, "rb") as f:
+                pdf_bytes = f.read()
+        try:
+            os.utime(entry)  # mark as most recently used
+        except FileNotFoundError:
+            pass
+        with self._lock:
+            self.hits += 1
+        return docx_bytes, pdf_bytes
+
+    def put(self, key, docx_bytes, pdf_bytes=None):
+        entry = self._entry_dir(key)
+        # Write into a private directory and rename it into place so readers never see half an entry
+        staging = tempfile.mkdtemp(prefix=".staging-", dir=self.root)
+        try:
+            with open(os.path.join(staging, DOCX_NAME), "wb") as f:
+                f.write(docx_bytes)
+            if pdf_bytes:
+                with open(os.path.join(staging, PDF_NAME), "wb") as f:
+                    f.write(pdf_bytes)
+            if os.path.exists(entry):
+                shutil.rmtree(entry, ignore_errors=True)
+            os.rename(staging, entry)
+        except OSError:
+            shutil.rmtree(staging, ignore_errors=True)
+            if not os.path.exists(os.path.join(entry, DOCX_NAME)):
+                raise
+        self.evict()
+
+    def _entries(self):
+        entries = []
+        for name in os.listdir(self.root):
+            if name.startswith("."):
+                continue
+            path = os.path.join(self.root, name)
+            try:
+                size = sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+                entries.append((os.path.getmtime(path), size, path))
+            except (FileNotFoundError, NotADirectoryError):
+                continue
+        return entries
+
+    def evict(self):
+        with self._lock:
+            entries = self._entries()
+            total = sum(size for _, size, _ in entries)
+            if total <= self.max_bytes:
+                return 0
+            removed = 0
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                shutil.rmtree(path, ignore_errors=True)
+                total -= size
+                removed += 1
+            self.evictions += removed
+            return removed
+
+    def clear(self):
+        with self._lock:
+            for _, _, path in self._entries():
+                shutil.rmtree(path, ignore_errors=True)
+
+    def stats(self):
+        entries = self._entries()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": len(entries),
+            "bytes": sum(size for _, size, _ in entries),
+            "max_bytes": self.max_bytes,
+        }
+
+
+def cached_call(cache, key, produce):
+    """Return (docx_bytes, pdf_bytes, hit); `produce()` runs only on a miss and must return (docx, pdf)."""
+    cached = cache.get(key)
+    if cached is not None:
+        return cached[0], cached[1], True
+    docx_bytes, pdf_bytes = produce()
+    cache.put(key, docx_bytes, pdf_bytes)
+    return docx_bytes, pdf_bytes, False
@@ -0,0 +1,100 @@
+import io
+import os
+
+from bodyParser import (OVERLAY_FIELDS, PIPELINE_VERSION, apply_overlay, convert_docx_bytes_to_pdf,
+                        document_to_bytes, format_body, load_document)
+import instrumentation
+from instrumentation import use_recorder
+from packageWriter import save_document
+from resultCache import DEFAULT_CACHE_DIR, ResultCache, cache_key
+
+
+# Parameters that only change the PDF export, never the DOCX
+PDF_FIELDS = ("pdf_profile",)
+
+
+def split_params(params):
+    """(body_params, overlay_params) of a format_document keyword set; PDF_FIELDS go to neither."""
+    body = {k: v for k, v in params.items() if k not in OVERLAY_FIELDS and k not in PDF_FIELDS}
+    overlay = {k: v for k, v in params.items() if k in OVERLAY_FIELDS}
+    return body, overlay
+
+
+def body_key(docx_bytes, params, pipeline_version=PIPELINE_VERSION):
+    # The logo and the header/footer fields never reach the body, so they stay out of its key
+    body_params, _ = split_params(params)
+    return cache_key(docx_bytes, b"", body_params, f"{pipeline_version}:body")
+
+
+def default_body_cache():
+    return ResultCache(root=DEFAULT_CACHE_DIR + "_body")
+
+
+# -----------------------------------------------
+class StagedPipeline:
+    """format_document split into cached stages: formatted body -> header/footer overlay -> PDF.
+
+    The formatted body is stored under a key that ignores the overlay fields, so an edit to
+    line1-3, doi_url, start_page_number or the footer only reloads that body and stamps a new
+    overlay. The finished DOCX and its PDF are stored under the full cache_key, like cached_call.
+    Either cache may be None to disable that level. A "pdf_profile" in params selects the PDF
+    export profile; it is part of the finished-result key but not of the body key.
+    """
+
+    def __init__(self, cache=None, body_cache=None):
+        self.cache = cache
+        self.body_cache = body_cache
+
+    def render(self, docx_bytes, logo_bytes, params, recorder=None, convert_pdf=True, workdir=None, lookup=True):
+        """Return (docx_bytes, pdf_bytes, stages) where stages maps body/overlay/pdf to "hit", "run" or "skip".
+
+        lookup=False skips the finished-result lookup for callers that already missed it.
+        """
+        stages = {"body": "skip", "overlay": "skip", "pdf": "skip"}
+        pdf_profile = params.get("pdf_profile", "default")
+        # One-shot soffice fallbacks of concurrent jobs must not share the default user profile
+        profile_dir = os.path.join(workdir, "soffice_profile") if workdir else None
+        with use_recorder(recorder):
+            key = cache_key(docx_bytes, logo_bytes, params, PIPELINE_VERSION)
+            cached = self.cache.get(key) if self.cache is not None and lookup else None
+            if cached is not None:
+                docx_out, pdf_out = cached
+                stages.update(body="hit", overlay="hit", pdf="hit" if pdf_out is not None else "skip")
+                if pdf_out is None and convert_pdf:
+                    stages["pdf"] = "run"
+                    pdf_out = convert_docx_bytes_to_pdf(docx_out, output_dir=workdir, pdf_profile=pdf_profile,
+                                                        profile_dir=profile_dir)
+                    self.cache.put(key, docx_out, pdf_out)
+                return docx_out, pdf_out, stages
+
+            body_params, overlay_params = split_params(params)
+            bkey = body_key(docx_bytes, params)
+            body = self.body_cache.get(bkey) if self.body_cache is not None else None
+            if body is not None:
+                stages["body"] = "hit"
+                with instrumentation.span("load"):
+                    doc = load_document(body[0])
+            else:
+                stages["body"] = "run"
+                doc = format_body(docx_bytes, **body_params)
+                if self.body_cache is not None:
+                    with instrumentation.span("body_store"):
+                        buffer = io.BytesIO()
+                        # The overlay save below still copies media from the upload
+                        save_document(doc, buffer, keep_source=True)
+                        self.body_cache.put(bkey, buffer.getvalue())
+
+            stages["overlay"] = "run"
+            apply_overlay(doc, logo_bytes, **overlay_params)
+            with instrumentation.span("save"):
+                docx_out = document_to_bytes(doc)
+
+            pdf_out = None
+            if convert_pdf:
+                stages["pdf"] = "run"
+                pdf_out = convert_docx_bytes_to_pdf(docx_out, output_dir=workdir, pdf_profile=pdf_profile,
+                                                    profile_dir=profile_dir)
+            if self.cache is not None:
+                self.cache.put(key, docx_out, pdf_out)
+            instrumentation.count("body_cache_hits" if stages["body"] == "hit" else "body_cache_misses")
+        return docx_out, pdf_out, stages
@@ -0,0 +1,136 @@
+import io
+import random
+
+import numpy as np
+from docx import Document
+from docx.enum.section import WD_ORIENT, WD_SECTION
+from docx.enum.text import WD_PARAGRAPH_ALIGNMENT
+from docx.shared import Inches
+from PIL import Image
+
+
+WORDS = ("analysis method result data model study effect sample value system process level "
+         "factor growth rate impact policy market region survey response measure group time "
+         "structure pattern variable theory evidence approach framework outcome signal").split()
+
+
+# Named points of the benchmark size matrix
+SIZE_MATRIX = {
+    "small": dict(paragraphs=40, headings=4, references=10, tables=1, table_rows=5, table_cols=4,
+                  images=1, sections=1),
+    "medium": dict(paragraphs=400, headings=20, references=60, tables=5, table_rows=20, table_cols=6,
+                   images=5, sections=3),
+    "large": dict(paragraphs=2000, headings=80, references=200, tables=20, table_rows=50, table_cols=8,
+                  images=20, sections=8),
+    "thesis": dict(paragraphs=6000, headings=250, references=600, tables=40, table_rows=200, table_cols=8,
+                   images=60, sections=20),
+    "table_heavy": dict(paragraphs=200, headings=10, references=30, tables=10, table_rows=2000, table_cols=6,
+                        images=0, sections=2),
+    "image_heavy": dict(paragraphs=200, headings=10, references=30, tables=2, table_rows=10, table_cols=4,
+                        images=40, sections=2, image_px=(3000, 2000)),
+}
+
+
+def _sentence(rng, words=12):
+    text = " ".join(rng.choice(WORDS) for _ in range(words))
+    return text[0].upper() + text[1:] + "."
+
+
+def _noise_image(rng, size):
+    # Noise compresses badly, which is closer to camera photos than a flat fill; seeded so runs repeat
+    width, height = size
+    noise = np.random.default_rng(rng.getrandbits(32)).normal(128, 64, (height, width))
+    return Image.fromarray(noise.clip(0, 255).astype(np.uint8), "L").convert("RGB")
+
+
+def _image_bytes(base, index):
+    # A tint derived from the index gives every figure its own bytes, so python-docx
+    # (which dedupes identical images) stores each one as a separate media part
+    tint = (index * 67 % 256, (index * 131 + 85) % 256, (index * 197 + 170) % 256)
+    img = Image.blend(base, Image.new("RGB", base.size, tint), 0.3)
+    buffer = io.BytesIO()
+    img.save(buffer, "JPEG", quality=90)
+    return buffer.getvalue()
+
+
+def make_logo(size=(200, 200)):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, (20, 60, 140)).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+# -----------------------------------------------
+def generate_manuscript(paragraphs=40, headings=4, references=10, tables=1, table_rows=5, table_cols=4,
+                        images=1, sections=1, runs_per_paragraph=4, image_px=(1600, 1200), seed=0):
+    """Build a manuscript shaped like the journal submissions process_document expects."""
+    rng = random.Random(seed)
+    doc = Document()
+
+    doc.add_paragraph("A Synthetic Study Of " + " ".join(rng.choice(WORDS).title() for _ in range(4)))
+    doc.add_paragraph("A. Author, B. Author, C. Author")
+    doc.add_paragraph("Department of Synthetic Studies, Example University")
+    doc.add_paragraph("Institute of Benchmarks, Sample City")
+    doc.add_paragraph("Corresponding Author: a.author@example.org")
+    doc.add_paragraph("ABSTRACT")
+    doc.add_paragraph(" ".join(_sentence(rng, 18) for _ in range(6)))
+
+    def every(count):
+        return max(1, paragraphs // count) if count else None
+
+    heading_every = every(headings)
+    table_every = every(tables)
+    image_every = every(images)
+    # sections - 1 breaks, one after every paragraphs // sections paragraphs
+    section_every = every(sections) if sections > 1 else None
+    image_base = _noise_image(rng, image_px) if images else None
+    heading_no = table_no = image_no = section_no = 0
+
+    for i in range(paragraphs):
+        if heading_every and i % heading_every == 0 and heading_no < headings:
+            heading_no += 1
+            if heading_no % 3 == 1:
+                h = doc.add_paragraph(f"{heading_no}. {rng.choice(WORDS).upper()} {rng.choice(WORDS).upper()}")
+                h.alignment = WD_PARAGRAPH_ALIGNMENT.CENTER
+            else:
+                doc.add_paragraph(f"{heading_no}.1 {rng.choice(WORDS).title()} {rng.choice(WORDS)}")
+
+        p = doc.add_paragraph()
+        for j in range(runs_per_paragraph):
+            run = p.add_run(_sentence(rng, rng.randint(8, 20)) + " ")
+            run.bold = j == 1 and i % 5 == 0
+            run.italic = j == 2 and i % 7 == 0
+
+        if table_every and i % table_every == table_every // 2 and table_no < tables:
+            table_no += 1
+            table = doc.add_table(rows=table_rows, cols=table_cols)
+            for r, row in enumerate(table.rows):
+                for c, cell in enumerate(row.cells):
+                    cell.text = f"{rng.choice(WORDS)} {r}.{c}"
+                    cell.width = Inches(1.4)
+
+        if image_every and i % image_every == image_every // 3 and image_no < images:
+            image_no += 1
+            doc.add_picture(io.BytesIO(_image_bytes(image_base, image_no)), width=Inches(7.5))
+
+        if section_every and i and i % section_every == 0 and section_no < sections - 1:
+            section_no += 1
+            section = doc.add_section(WD_SECTION.NEW_PAGE)
+            if section_no % 2:
+                section.orientation = WD_ORIENT.LANDSCAPE
+                section.page_width, section.page_height = section.page_height, section.page_width
+
+    doc.add_paragraph("References")
+    for i in range(references):
+        doc.add_paragraph(f"Author{i}, X. ({2000 + i % 25}). {_sentence(rng, 10)} Journal of Tests, {i % 40 + 1}({i % 12 + 1}), {i}-{i + 9}.")
+    return doc
+
+
+def manuscript_bytes(**spec):
+    buffer = io.BytesIO()
+    generate_manuscript(**spec).save(buffer)
+    return buffer.getvalue()
+
+
+def save_manuscript(path, **spec):
+    generate_manuscript(**spec).save(path)
+    return path
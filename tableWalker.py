@@ -0,0 +1,91 @@
+from lxml import etree
+
+from docx.enum.table import WD_TABLE_ALIGNMENT
+from docx.oxml.ns import nsmap, qn
+
+import instrumentation
+
+
+EMU_PER_TWIP = 635
+
+W_W = qn("w:w")
+W_TYPE = qn("w:type")
+TBL_TAG = qn("w:tbl")
+
+# One XPath per table instead of python-docx's per-row cell grid
+_grid_cols = etree.XPath("./w:tblGrid/w:gridCol", namespaces=nsmap)
+_cell_widths = etree.XPath("./w:tr/w:tc/w:tcPr/w:tcW", namespaces=nsmap)
+_first_row_widths = etree.XPath("./w:tr[1]/w:tc/w:tcPr/w:tcW", namespaces=nsmap)
+_table_width = etree.XPath("./w:tblPr/w:tblW", namespaces=nsmap)
+# Direct font sizes on the runs of cell paragraphs, as center_tables_and_images cleared them run by run
+_cell_run_sizes = etree.XPath("./w:tr/w:tc/w:p/w:r/w:rPr/w:sz", namespaces=nsmap)
+
+
+def _twips(el):
+    value = el.get(W_W, "")
+    return int(value) if value.lstrip("-").isdigit() else 0
+
+
+def _is_dxa(el):
+    # w:type defaults to dxa (twentieths of a point) on gridCol-like widths
+    return el.get(W_TYPE, "dxa") == "dxa"
+
+
+def _scale_widths(elements, scale):
+    # Tables repeat a handful of widths thousands of times, so each distinct value is scaled once
+    scaled = {}
+    for el in elements:
+        value = el.get(W_W)
+        if value is None or not _is_dxa(el):
+            continue
+        new = scaled.get(value)
+        if new is None:
+            twips = _twips(el)
+            new = scaled[value] = str(int(twips * scale)) if twips else value
+        el.set(W_W, new)
+
+
+# -----------------------------------------------
+def table_width(tbl):
+    """Width of a w:tbl in twips: the w:tblGrid columns, or the first row's cell widths without a grid."""
+    width = sum(_twips(col) for col in _grid_cols(tbl))
+    if not width:
+        width = sum(_twips(tcW) for tcW in _first_row_widths(tbl) if _is_dxa(tcW))
+    return width
+
+
+def fit_table(tbl, usable_width, align=WD_TABLE_ALIGNMENT.CENTER):
+    """Center one w:tbl and shrink it proportionally to `usable_width` (EMU) when it is wider.
+
+    Scales the grid columns, every dxa cell width and a dxa table width in one walk, and
+    clears direct font sizes from the cells' runs. Returns the scale applied (1.0 if it fit).
+    """
+    tbl.tblPr.alignment = align
+    usable = int(usable_width) // EMU_PER_TWIP
+    width = table_width(tbl)
+    if not width or width <= usable:
+        return 1.0
+
+    scale = usable / width
+    _scale_widths(_grid_cols(tbl), scale)
+    _scale_widths(_cell_widths(tbl), scale)
+    for tblW in _table_width(tbl):
+        if _is_dxa(tblW) and _twips(tblW) > usable:
+            tblW.set(W_W, str(usable))
+    for sz in _cell_run_sizes(tbl):
+        sz.getparent().remove(sz)
+    return scale
+
+
+def fit_tables(doc, usable_width=None):
+    """fit_table on every top-level table of the body; returns a report."""
+    if usable_width is None:
+        section = doc.sections[0]
+        usable_width = section.page_width - section.left_margin - section.right_margin
+    report = {"tables": 0, "rescaled": 0}
+    for tbl in doc.element.body.iterchildren(TBL_TAG):
+        report["tables"] += 1
+        if fit_table(tbl, usable_width) < 1.0:
+            report["rescaled"] += 1
+    instrumentation.count("tables_fitted", report["tables"])
+    return report
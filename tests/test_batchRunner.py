@@ -0,0 +1,24 @@
+import json
+
+import pytest
+
+from batchRunner import load_manifest
+
+
+def _write_manifest(tmp_path, jobs):
+    path = tmp_path / "manifest.json"
+    path.write_text(json.dumps({"defaults": {"logo": "logo.png"}, "jobs": jobs}), encoding="utf-8")
+    return path
+
+
+def test_same_stem_from_different_directories_is_rejected(tmp_path):
+    path = _write_manifest(tmp_path, [{"id": "a", "input": "one/paper.docx"}, {"id": "b", "input": "two/paper.docx"}])
+    with pytest.raises(ValueError, match="'a' and 'b'"):
+        load_manifest(path)
+
+
+def test_explicit_output_resolves_the_clash(tmp_path):
+    path = _write_manifest(tmp_path, [{"id": "a", "input": "one/paper.docx"},
+                                      {"id": "b", "input": "two/paper.docx", "output": "out/b.docx"}])
+    jobs = load_manifest(path)
+    assert [j["output"] for j in jobs] == [str(tmp_path / "generated" / "paper.docx"), str(tmp_path / "out" / "b.docx")]
@@ -0,0 +1,24 @@
+import io
+
+import pytest
+from docx import Document
+
+from bodyParser import format_document
+from syntheticDocs import make_logo
+
+
+def _manuscript(heading):
+    doc = Document()
+    for text in ("A Title", "A. Author", "Department of Tests", "Abstract: a summary that runs long enough.",
+                 "Body text that is long enough to stay a body paragraph.", heading, "Author, A. (2020). A work."):
+        doc.add_paragraph(text)
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize("heading, expected", [("References", "REFERENCES"), ("Works Cited", "Works Cited"),
+                                               ("Bibliography", "Bibliography")])
+def test_epra_reference_headings_keep_their_wording(heading, expected):
+    doc = format_document(_manuscript(heading), make_logo(), journalCode="EPRA")
+    assert [p.text for p in doc.paragraphs][-2:] == [expected, "[1] Author, A. (2020). A work."]
@@ -0,0 +1,91 @@
+import io
+
+import pytest
+from docx import Document
+from docx.enum.text import WD_PARAGRAPH_ALIGNMENT
+
+from bodyParser import format_document
+from syntheticDocs import make_logo
+
+TITLE = "A Short Study Of Styles"
+KEYWORDS = "Keywords: alpha, beta, gamma"
+CAPTION = "Table 1. Mean Scores"
+BULLET = "A bulleted point that belongs to the abstract and is long enough to stay body text."
+QUOTE = "A quoted passage that belongs to the abstract and is long enough to stay body text."
+
+
+def _manuscript():
+    doc = Document()
+    doc.add_paragraph(TITLE)
+    doc.add_paragraph("A. Author, B. Author")
+    doc.add_paragraph("Department of Styles, Example University")
+    doc.add_paragraph("ABSTRACT")
+    doc.add_paragraph("This abstract is long enough that nothing mistakes it for a heading of any kind at all here.")
+    doc.add_paragraph(BULLET, style="List Bullet")
+    doc.add_paragraph(QUOTE, style="Quote")
+    keywords = doc.add_paragraph()
+    keywords.add_run("Keywords: ").bold = True
+    keywords.add_run("alpha, beta, gamma")
+    doc.add_paragraph("The body text is long enough that it stays a body paragraph and never turns into a heading.")
+    doc.add_paragraph(CAPTION, style="Heading 2")
+    doc.add_paragraph("REFERENCES")
+    doc.add_paragraph("Author, A. (2020). A referenced work with a title. Journal of Tests, 1(1), 1-9.")
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def _chain(style):
+    while style is not None:
+        yield style
+        style = style.base_style
+
+
+def _look(paragraph):
+    """Effective alignment and per-run (text, bold, size) after style inheritance."""
+    alignment = paragraph.alignment
+    if alignment is None:
+        alignment = next((s.paragraph_format.alignment for s in _chain(paragraph.style)
+                          if s.paragraph_format.alignment is not None), WD_PARAGRAPH_ALIGNMENT.LEFT)
+    runs = []
+    for run in paragraph.runs:
+        bold = run.bold
+        if bold is None:
+            bold = next((s.font.bold for s in _chain(paragraph.style) if s.font.bold is not None), False)
+        size = run.font.size or next((s.font.size for s in _chain(paragraph.style) if s.font.size is not None), None)
+        runs.append((run.text, bool(bold), size.pt if size else None))
+    return alignment, runs
+
+
+@pytest.fixture(scope="module")
+def outputs():
+    source = _manuscript()
+    return {engine: format_document(source, make_logo(), styling_engine=engine) for engine in ("docx", "styles")}
+
+
+def _find(doc, text):
+    return next(p for p in doc.paragraphs if p.text.strip() == text)
+
+
+@pytest.mark.parametrize("text", [TITLE, KEYWORDS])
+def test_styles_engine_looks_like_docx_engine(outputs, text):
+    assert _look(_find(outputs["styles"], text)) == _look(_find(outputs["docx"], text))
+
+
+def test_title_stays_centred(outputs):
+    alignment, runs = _look(_find(outputs["styles"], TITLE))
+    assert alignment == WD_PARAGRAPH_ALIGNMENT.CENTER
+    assert runs[0][1:] == (True, 11.0)
+
+
+def test_only_the_first_keyword_run_is_bold(outputs):
+    _, runs = _look(_find(outputs["styles"], KEYWORDS))
+    assert [bold for _, bold, _ in runs] == [True, False]
+
+
+@pytest.mark.parametrize("text, style", [(CAPTION, "Heading 2"), (BULLET, "List Bullet"), (QUOTE, "Quote")])
+def test_author_styles_are_kept(outputs, text, style):
+    # Paragraphs in the author's own styles keep them and get the docx engine's direct formatting
+    styled, direct = _find(outputs["styles"], text), _find(outputs["docx"], text)
+    assert styled.style.name == direct.style.name == style
+    assert styled._element.xml == direct._element.xml
@@ -0,0 +1,49 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import issueAssembler
+
+
+# Page counts of the pass-1 PDFs and of renumbered ones ("<docx>@<start>")
+PAGES = {
+    "a.pdf": 4, "b.pdf": 3, "c.pdf": 2,
+    "b.docx@5": 4,  # wider page numbers reflow article b onto one more page
+    "c.docx@8": 2, "c.docx@9": 2,
+}
+
+
+@pytest.fixture
+def issue(monkeypatch):
+    calls = {"renumber": [], "merged": None}
+
+    def run_batch(jobs, **kwargs):
+        return {"results": [{"id": j["id"], "status": "ok", "output_docx": f"{j['id']}.docx",
+                             "output_pdf": f"{j['id']}.pdf"} for j in jobs]}
+
+    def renumber_job(docx_path, start, scratch_root=None, pdf_profile="default"):
+        calls["renumber"].append((docx_path, start))
+        return f"{docx_path}@{start}"
+
+    def merge_pdfs(entries, output_pdf):
+        calls["merged"] = [(e["id"], e["pdf"]) for e in entries]
+        return output_pdf
+
+    monkeypatch.setattr(issueAssembler, "run_batch", run_batch)
+    monkeypatch.setattr(issueAssembler, "renumber_job", renumber_job)
+    monkeypatch.setattr(issueAssembler, "merge_pdfs", merge_pdfs)
+    monkeypatch.setattr(issueAssembler, "page_count", PAGES.__getitem__)
+    monkeypatch.setattr(issueAssembler, "estimated_pages", lambda path: 2)
+    monkeypatch.setattr(issueAssembler, "ProcessPoolExecutor", ThreadPoolExecutor)
+    return calls
+
+
+def test_page_count_change_in_pass_2_repaginates_later_articles(issue, tmp_path):
+    jobs = [{"id": name, "input": f"{name}.docx"} for name in "abc"]
+    report = issueAssembler.assemble_issue(jobs, str(tmp_path / "issue.pdf"), first_page=1, workers=2)
+
+    assert [(e["id"], e["start_page"], e["end_page"]) for e in report["toc"]] == [("a", 1, 4), ("b", 5, 8), ("c", 9, 10)]
+    assert report["pages"] == 10
+    assert report["renumber_rounds"] == 2
+    assert issue["renumber"][-1] == ("c.docx", 9)
+    assert issue["merged"] == [("a", "a.pdf"), ("b", "b.docx@5"), ("c", "c.docx@9")]
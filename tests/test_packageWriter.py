@@ -0,0 +1,63 @@
+import io
+import zipfile
+
+import packageWriter
+from bodyParser import load_document
+from packageWriter import save_document, supports_raw_copy
+from syntheticDocs import SIZE_MATRIX, manuscript_bytes
+
+
+def _members(data):
+    with zipfile.ZipFile(io.BytesIO(data)) as z:
+        assert z.testzip() is None
+        return {info.filename: z.read(info) for info in z.infolist()}
+
+
+def _source():
+    return manuscript_bytes(**dict(SIZE_MATRIX["medium"], image_px=(320, 240)))
+
+
+def _saved(doc):
+    buffer = io.BytesIO()
+    report = save_document(doc, buffer)
+    return buffer.getvalue(), report
+
+
+def test_zipfile_internals_are_still_there():
+    # Fails loudly when a CPython update drops what copy_raw_entry writes through
+    with zipfile.ZipFile(io.BytesIO(), "w") as out:
+        assert supports_raw_copy(out), "zipfile internals changed; revisit packageWriter.copy_raw_entry"
+
+
+def test_raw_copy_gives_the_same_package_as_document_save():
+    source = _source()
+    data, report = _saved(load_document(source))
+    assert report["copied"] >= SIZE_MATRIX["medium"]["images"]
+
+    reference = io.BytesIO()
+    load_document(source).save(reference)
+    assert _members(data) == _members(reference.getvalue())
+
+
+def test_without_the_internals_every_part_is_written(monkeypatch):
+    monkeypatch.setattr(packageWriter, "supports_raw_copy", lambda out: False)
+    source = _source()
+    data, report = _saved(load_document(source))
+    assert report["copied"] == 0
+
+    reference = io.BytesIO()
+    load_document(source).save(reference)
+    assert _members(data) == _members(reference.getvalue())
+
+
+def test_stream_source_is_kept_by_reference_and_released():
+    stream = io.BytesIO(_source())
+    doc = load_document(stream)
+    assert packageWriter.source_of(doc) is stream
+    data, report = _saved(doc)
+    assert report["copied"] >= SIZE_MATRIX["medium"]["images"]
+    assert packageWriter.source_of(doc) is None
+
+    reference = io.BytesIO()
+    load_document(io.BytesIO(stream.getvalue())).save(reference)
+    assert _members(data) == _members(reference.getvalue())
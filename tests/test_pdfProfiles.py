@@ -0,0 +1,25 @@
+import os
+import stat
+
+import pytest
+
+from pdfProfiles import linearize_pdf
+
+
+@pytest.fixture
+def fake_qpdf(tmp_path):
+    # Writes a stand-in output and exits with the code the test asks for
+    script = tmp_path / "qpdf"
+    script.write_text('#!/bin/sh\nprintf linearized > "$3"; exit $QPDF_RC\n')
+    script.chmod(script.stat().st_mode | stat.S_IEXEC)
+    return str(script)
+
+
+@pytest.mark.parametrize("code, linearized", [(0, True), (3, True), (2, False)])
+def test_qpdf_warnings_still_count_as_success(tmp_path, fake_qpdf, monkeypatch, code, linearized):
+    pdf = tmp_path / "doc.pdf"
+    pdf.write_bytes(b"%PDF-1.7 original")
+    monkeypatch.setenv("QPDF_RC", str(code))
+    assert linearize_pdf(str(pdf), qpdf_bin=fake_qpdf) is linearized
+    assert pdf.read_bytes() == (b"linearized" if linearized else b"%PDF-1.7 original")
+    assert not os.path.exists(str(pdf) + ".linear")
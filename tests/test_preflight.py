@@ -0,0 +1,15 @@
+from preflight import FAST, preflight
+from syntheticDocs import SIZE_MATRIX, manuscript_bytes
+
+
+def test_open_file_handle(tmp_path):
+    data = manuscript_bytes(**dict(SIZE_MATRIX["small"], image_px=(64, 48)))
+    path = tmp_path / "small.docx"
+    path.write_bytes(data)
+    with open(path, "rb") as f:
+        f.read(10)  # preflight measures and reads from the start whatever the position
+        report = preflight(f)
+        assert not f.closed
+    assert report["lane"] == FAST
+    assert report["stats"]["package_bytes"] == len(data)
+    assert report == dict(preflight(str(path)), seconds=report["seconds"])
@@ -0,0 +1,31 @@
+import io
+import zipfile
+
+import pytest
+
+from syntheticDocs import SIZE_MATRIX, generate_manuscript, manuscript_bytes
+
+
+def _media(data):
+    with zipfile.ZipFile(io.BytesIO(data)) as z:
+        return [z.read(n) for n in sorted(z.namelist()) if n.startswith("word/media/")]
+
+
+def test_image_heavy_stores_every_image_as_its_own_part():
+    spec = dict(SIZE_MATRIX["image_heavy"], image_px=(64, 48))
+    media = _media(manuscript_bytes(**spec))
+    assert len(media) == spec["images"]
+    assert len(set(media)) == spec["images"]
+
+
+def test_same_seed_gives_the_same_images():
+    spec = dict(SIZE_MATRIX["medium"], image_px=(64, 48))
+    assert _media(manuscript_bytes(**spec)) == _media(manuscript_bytes(**spec))
+
+
+@pytest.mark.parametrize("case", list(SIZE_MATRIX))
+def test_section_count_matches_the_matrix(case):
+    spec = SIZE_MATRIX[case]
+    # Table and image sizes do not move the section breaks; shrink them to keep the test quick
+    doc = generate_manuscript(**dict(spec, table_rows=1, image_px=(64, 48)))
+    assert len(doc.sections) == spec["sections"]
@@ -0,0 +1,165 @@
+import re
+
+from lxml import etree
+
+from docx.oxml.ns import nsmap, qn
+
+import instrumentation
+
+
+W = nsmap["w"]
+R_TAG = qn("w:r")
+RPR_TAG = qn("w:rPr")
+T_TAG = qn("w:t")
+XML_SPACE = "{http://www.w3.org/XML/1998/namespace}space"
+
+# Revision-save IDs: Word writes them on almost every element and nothing renders from them
+RSID_ATTRS = {qn(f"w:{name}") for name in
+              ("rsidR", "rsidRPr", "rsidRDefault", "rsidP", "rsidDel", "rsidSect", "rsidTr")}
+
+# Run children that can be moved between runs without changing meaning
+_MERGEABLE = {qn(f"w:{name}") for name in ("t", "tab", "br", "softHyphen", "noBreakHyphen")}
+
+_rsid_attributes = etree.XPath(".//@*[starts-with(local-name(), 'rsid')]")
+_element_count = etree.XPath("count(.//*)")
+_run_count = etree.XPath("count(.//w:r)", namespaces=nsmap)
+_proof_errors = etree.XPath(".//w:proofErr", namespaces=nsmap)
+_bookmark_starts = etree.XPath(".//w:bookmarkStart", namespaces=nsmap)
+_bookmark_ends = etree.XPath(".//w:bookmarkEnd", namespaces=nsmap)
+_anchors = etree.XPath(".//w:hyperlink/@w:anchor", namespaces=nsmap)
+_field_codes = etree.XPath(".//w:instrText/text() | .//w:fldSimple/@w:instr", namespaces=nsmap)
+_run_parents = etree.XPath(".//w:p | .//w:hyperlink | .//w:ins | .//w:smartTag | .//w:fldSimple", namespaces=nsmap)
+
+
+def _count_elements(root):
+    return int(_element_count(root)) + 1
+
+
+# -----------------------------------------------
+def strip_rsids(root):
+    removed = 0
+    for attr in _rsid_attributes(root):
+        if attr.attrname in RSID_ATTRS:
+            del attr.getparent().attrib[attr.attrname]
+            removed += 1
+    return removed
+
+
+def strip_proofing(root):
+    marks = _proof_errors(root)
+    for el in marks:
+        el.getparent().remove(el)
+    return len(marks)
+
+
+def strip_hidden_bookmarks(root):
+    """Drop hidden ("_"-prefixed) bookmarks that nothing links to, e.g. _GoBack or stale _Hlk/_Toc marks."""
+    referenced = set(_anchors(root))
+    for code in _field_codes(root):
+        referenced.update(re.findall(r"_[A-Za-z0-9_]+", code))
+    ids = set()
+    for start in _bookmark_starts(root):
+        name = start.get(qn("w:name"), "")
+        if name.startswith("_") and name not in referenced:
+            ids.add(start.get(qn("w:id")))
+            start.getparent().remove(start)
+    for end in _bookmark_ends(root):
+        if end.get(qn("w:id")) in ids:
+            end.getparent().remove(end)
+    return len(ids)
+
+
+def _split_run(run):
+    # (rPr, content, mergeable) in one pass over the run's children
+    rPr = None
+    content = []
+    mergeable = True
+    for child in run:
+        tag = child.tag
+        if tag == RPR_TAG:
+            rPr = child
+        else:
+            content.append(child)
+            if tag not in _MERGEABLE:
+                mergeable = False
+    return rPr, content, mergeable
+
+
+def _rpr_key(rPr):
+    if rPr is None:
+        return ()
+    key = []
+    for child in rPr:
+        if len(child):
+            return etree.tostring(rPr)  # nested properties (e.g. w:rPrChange): compare the serialized form
+        key.append((child.tag, tuple(child.attrib.items())))
+    return tuple(key)
+
+
+def _append_content(target, content):
+    for child in content:
+        last = target[-1] if len(target) else None
+        if child.tag == T_TAG and last is not None and last.tag == T_TAG:
+            last.text = (last.text or "") + (child.text or "")
+            if last.text != last.text.strip() or "  " in last.text:
+                last.set(XML_SPACE, "preserve")
+        else:
+            target.append(child)
+
+
+def coalesce_runs(root):
+    """Merge each run into the previous sibling run when both carry the same rPr and only text-like content."""
+    merged = removed_empty = 0
+    for parent in _run_parents(root):
+        previous = previous_key = None
+        for child in list(parent):
+            if child.tag != R_TAG:
+                previous = None
+                continue
+            rPr, content, ok = _split_run(child)
+            if not content:
+                # A run with nothing but properties renders nothing
+                parent.remove(child)
+                removed_empty += 1
+                continue
+            if not ok:
+                previous = None
+                continue
+            key = _rpr_key(rPr)
+            if previous is not None and key == previous_key:
+                _append_content(previous, content)
+                parent.remove(child)
+                merged += 1
+            else:
+                previous, previous_key = child, key
+    return merged, removed_empty
+
+
+def compact_document(doc):
+    """Normalize document.xml before styling: fewer runs, no rsid/proofing/bookmark noise. Returns counts."""
+    body = doc.element.body
+    runs_before = int(_run_count(body))
+    elements_before = _count_elements(body)
+
+    report = {
+        "rsid_attributes": strip_rsids(body),
+        "proofing_marks": strip_proofing(body),
+        "bookmarks": strip_hidden_bookmarks(body),
+    }
+    report["runs_merged"], report["empty_runs"] = coalesce_runs(body)
+
+    # The settings part keeps the matching list of every rsid ever used
+    settings = doc.settings.element
+    rsids = settings.find(qn("w:rsids"))
+    if rsids is not None:
+        settings.remove(rsids)
+
+    report.update(
+        elements_before=elements_before,
+        elements_after=_count_elements(body),
+        runs_before=runs_before,
+        runs_after=int(_run_count(body)),
+    )
+    instrumentation.count("elements_removed", report["elements_before"] - report["elements_after"])
+    instrumentation.count("runs_merged", report["runs_merged"])
+    return report